@@ -1,11 +1,11 @@
-import os
 import sqlite3
-import uuid
 
 from argon2 import exceptions as argon2_exceptions
 from flask import Blueprint, render_template, request, redirect, session, flash, current_app
 from helpers import login_required, show_error, get_db, ph, remove_photo
-from werkzeug.utils import secure_filename
+from invite_cache import invite_cache
+from usernames import taken_usernames
+from photos import PhotoError, read_capped, render_photo, store_photo
 
 # Adapted from: Real Python
 # URL: https://realpython.com/flask-blueprint/
@@ -50,21 +50,30 @@ def account_details():
         # URL: https://flask.palletsprojects.com/en/stable/patterns/fileuploads/
         # Ensure file is chosen and named
         if upload_file and upload_file.filename:
-            # Aapted from: Python documentation - os.path
-            # URL: https://docs.python.org/3/library/os.path.html
-            # Adaptation guidance by ChatGPT (OpenAI)
-
-            # Ensure safe naming and get file path to save (hex in case of similar names)
-            file_name = f"{uuid.uuid4().hex}_{secure_filename(upload_file.filename)}"
-            file_path = os.path.join(current_app.root_path, "static", "uploads", file_name)
-            upload_file.save(file_path)
-
-            # Create web path from file path
-            u_web_path = "/" + os.path.relpath(file_path, current_app.root_path).replace(os.sep, "/")
+            # Read at most PHOTO_MAX_BYTES of the spooled upload (the body itself is capped
+            # by MAX_CONTENT_LENGTH), then downsize to avatar + thumbnail (see photos.py)
+            try:
+                data = read_capped(upload_file.stream, current_app.config["PHOTO_MAX_BYTES"])
+                digest, renders = render_photo(data)
+            except PhotoError as e:
+                return render_template("account_details.html", user=user, has_google=has_google, photo_fb=str(e))
 
             # Store photo to be removed before changing to default
             r_web_path = user["photo"]
-            cur.execute("UPDATE users SET photo = ? WHERE id = ?", (u_web_path, user_id))
+
+            # Save files before taking the write lock (no db lock held while writing them)
+            u_web_path = store_photo(current_app.root_path, digest, renders)
+
+            # Short transaction for the reference swap. remove_photo of an identical photo
+            # may have deleted the files since: under the lock nothing else can, so put
+            # back whatever is missing (normally just two stat calls)
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                store_photo(current_app.root_path, digest, renders)
+                cur.execute("UPDATE users SET photo = ? WHERE id = ?", (u_web_path, user_id))
+            except Exception:
+                db.rollback()
+                raise
             db.commit()
 
             remove_photo(r_web_path, d_web_path)
@@ -82,6 +91,8 @@ def account_details():
         try:
             cur.execute("UPDATE users SET username = ? WHERE id = ?", (username, user_id))
             db.commit()
+            invite_cache.discard_creator(user_id)  # Invitations show the creator's name
+            taken_usernames.add(username)
         except sqlite3.IntegrityError:
             return render_template("account_details.html", user=user, has_google=has_google, username_fb="username taken")
 
@@ -126,12 +137,9 @@ def reset_password():
             except argon2_exceptions.VerifyMismatchError:
                 old_psw_fb = "incorrect password"
             else:
-                # Valiate new password
-                try:
-                    if ph.verify(user["hash"], new_password):
-                        new_psw_fb = "same as old password"
-                except argon2_exceptions.VerifyMismatchError:
-                    pass  # New password is different
+                # Valiate new password (old one just verified, so compare directly)
+                if new_password == password:
+                    new_psw_fb = "same as old password"
     
         # Return feedbck if any
         if old_psw_fb or new_psw_fb:
@@ -187,8 +195,12 @@ def delete_account():
 
         # Proceed to delete (No errors)
         session.clear()
+        cur.execute("SELECT photo FROM users WHERE id = ?", (user_id,))
+        r_web_path = cur.fetchone()["photo"]
         cur.execute("DELETE FROM users WHERE id = ?", (user_id,))
         db.commit()
+        invite_cache.discard_creator(user_id)
+        remove_photo(r_web_path, "/static/uploads/default.png")
 
         flash("Account deleted!", "success")
         return redirect("/")
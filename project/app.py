@@ -2,10 +2,26 @@ import os
 
 from flask import Flask
 from flask_session import Session
-from helpers import db_teardown
+from helpers import db_teardown, expire_event, load_expiries, show_error, ph
+from db_pool import pool_stats
+from migrate import migrate
+from scheduler import expiry_scheduler
+from lookups import lookups
+from passwords import PasswordBusyError
+from photos import thumb_url
+from sessions import init_sessions
+from http_cache import init_http_cache
+from metrics import init_metrics, metrics
+from query_plans import init_query_plans
+from page_cache import plan_cache
+from event_watch import event_changes
+from invite_cache import invite_cache
+from usernames import taken_usernames
+from oidc_cache import oidc_documents, warm as warm_oidc
+from push import push_broker
 
 # blueprints
-from auth import auth_bp, oauth
+from auth import auth_bp, oauth, CONF_URL
 from acc import acc_bp
 from event import event_bp
 
@@ -24,13 +40,96 @@ if os.environ.get("PYTHONANYWHERE_DOMAIN") is None:
 
 app.secret_key = os.environ.get("SECRET_KEY")
 
-# Configure session to use filesystem (instead of signed cookies)
+# Configure server-side session (instead of signed cookies)
+# SESSION_BACKEND: "sqlite" (default, sessions.db), "memory" (single worker) or "filesystem" (Flask-Session)
 app.config["SESSION_PERMANENT"] = False
-app.config["SESSION_TYPE"] = "filesystem"
-Session(app)
+app.config["SESSION_TTL"] = int(os.environ.get("SESSION_TTL", 7 * 24 * 3600))
+app.config["SESSION_SWEEP_INTERVAL"] = int(os.environ.get("SESSION_SWEEP_INTERVAL", 600))
+session_backend = os.environ.get("SESSION_BACKEND", "sqlite")
+if session_backend == "filesystem":
+    app.config["SESSION_TYPE"] = "filesystem"
+    Session(app)
+else:
+    init_sessions(app, session_backend)
+
+# Pooled sqlite connections per worker (see db_pool.py)
+app.config["DB_POOL_SIZE"] = int(os.environ.get("DB_POOL_SIZE", 5))
+app.config["DB_POOL_TIMEOUT"] = float(os.environ.get("DB_POOL_TIMEOUT", 5))
+
+# Upload limits: MAX_CONTENT_LENGTH is what bounds memory/disk per request (Werkzeug
+# rejects larger bodies, smaller ones are spooled whole before the view runs);
+# PHOTO_MAX_BYTES is then checked on the spooled file, only to refuse big photos
+app.config["PHOTO_MAX_BYTES"] = int(os.environ.get("PHOTO_MAX_BYTES", 5 * 1024 * 1024))
+app.config["MAX_CONTENT_LENGTH"] = int(os.environ.get("MAX_CONTENT_LENGTH", 8 * 1024 * 1024))
+
+# Dashboard cards per page (keyset pagination)
+app.config["DASHBOARD_PAGE_SIZE"] = int(os.environ.get("DASHBOARD_PAGE_SIZE", 24))
+
+# Status API long-polls parked at once per worker. Each ?wait= request holds a worker thread
+# for up to 30s, so ?wait is off (answered at once) unless LONGPOLL_MAX_WAITERS is set, and
+# should stay below the worker's thread count
+event_changes.max_waiters = int(os.environ.get("LONGPOLL_MAX_WAITERS", 0))
+
+# Live dashboard updates over SSE (/api/stream). Each open tab holds a worker thread, so
+# this is off unless PUSH_ENABLED=1 on a threaded/async server
+app.config["PUSH_ENABLED"] = os.environ.get("PUSH_ENABLED", "0") == "1"
+
+# Request metrics (METRICS=0 turns collectors off); /metrics is only served with METRICS_TOKEN set,
+# as a bearer token, and is a 404 otherwise
+app.config["METRICS_ENABLED"] = os.environ.get("METRICS", "1") == "1"
+app.config["METRICS_TOKEN"] = os.environ.get("METRICS_TOKEN")
+
+# Database file (DATABASE env points tools/tests at a scratch copy instead of planit.db)
+app.config["DATABASE"] = os.environ.get("DATABASE") or os.path.join(app.root_path, "planit.db")
+
+# Bring the database up to the latest schema (no-op when already migrated)
+migrate(app.config["DATABASE"])
 
 oauth.init_app(app)  # Sets up Authlib OAuth with Flask
+oidc_documents.logger = app.logger
+
+# Google discovery metadata/JWKS from the shared disk cache (or fetched) in the background,
+# so the first login after a deploy doesn't wait on them (OIDC_WARM=0 to skip)
+if os.environ.get("GOOGLE_CLIENT_ID") and os.environ.get("OIDC_WARM", "1") == "1":
+    warm_oidc(CONF_URL, app.logger)
+
 db_teardown(app)     # Register db teardown
+app.add_template_filter(thumb_url, "thumb")  # {{ photo | thumb }} for small avatars
+
+# Latency/SQL/render collectors plus component stats (Argon2 pool, db pools, caches)
+init_metrics(app)
+metrics.add_source("passwords", ph.stats)
+metrics.add_source("db_pool", pool_stats)
+metrics.add_source("plan_cache", plan_cache.stats)
+metrics.add_source("invite_cache", invite_cache.stats)
+metrics.add_source("usernames", taken_usernames.stats)
+metrics.add_source("oidc", oidc_documents.stats)
+metrics.add_source("expiry_scheduler", expiry_scheduler.stats)
+metrics.add_source("event_changes", event_changes.stats)
+metrics.add_source("push", push_broker.stats)
+
+# SSE fan-out across worker processes through the local relay (python push.py relay,
+# workers authenticate with PUSH_RELAY_SECRET);
+# with push off there are no streams anywhere, so announce() skips the relay entirely
+if not app.config["PUSH_ENABLED"]:
+    push_broker.relay = None
+elif push_broker.relay is not None:
+    app.before_request(push_broker.relay.start)
+
+# Development: EXPLAIN every distinct statement, warn on full scans/temp b-trees (python query_plans.py --check for CI)
+if os.environ.get("SQL_PLAN_CHECK") == "1":
+    init_query_plans(app)
+
+# Fingerprinted static urls ({{ static_url('styles.css') }}) and Cache-Control per route
+init_http_cache(app)
+
+# Warm lookup cache (focuses, settings, statuses) once per process
+with app.app_context():
+    lookups.load()
+
+# Run removal_check in the background as invites expire (system_check.py cron still works)
+if os.environ.get("EXPIRY_SCHEDULER", "1") == "1":
+    expiry_scheduler.init_app(app, expire_event, load_expiries)
 
 # Adapted from: Real Python
 # URL: https://realpython.com/flask-blueprint/
@@ -40,11 +139,15 @@ app.register_blueprint(acc_bp)
 app.register_blueprint(event_bp)
 
 
-# Disable data cache (Ensures fresh content)
-@app.after_request
-def after_request(response):
-    """Ensure responses aren't cached"""
-    response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
-    response.headers["Expires"] = 0
-    response.headers["Pragma"] = "no-cache"
-    return response
+# Password workers saturated (login burst), ask user to retry instead of piling up
+@app.errorhandler(PasswordBusyError)
+def password_busy(error):
+    """Show retry page when the password pool is full"""
+    return show_error("Server busy, please try again."), 503
+
+
+# Request body over MAX_CONTENT_LENGTH (e.g. huge photo upload)
+@app.errorhandler(413)
+def too_large(error):
+    """Show error page for oversized uploads"""
+    return show_error("File too large."), 413
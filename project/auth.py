@@ -7,8 +7,10 @@ import sqlite3
 
 from authlib.integrations.flask_client import OAuth
 from argon2 import exceptions as argon2_exceptions
-from flask import Blueprint, render_template, request, redirect, session, flash, url_for
+from flask import Blueprint, render_template, request, redirect, session, flash, url_for, jsonify
 from helpers import login_required, get_db, ph, unique_username
+from oidc_cache import CachedOIDCApp
+from usernames import taken_usernames
 
 # Adapted from: Real Python
 # URL: https://realpython.com/flask-blueprint/
@@ -24,13 +26,15 @@ GOOGLE_CLIENT_ID = os.environ.get('GOOGLE_CLIENT_ID')
 GOOGLE_CLIENT_SECRET = os.environ.get('GOOGLE_CLIENT_SECRET')
 
 # Auto-fetch all the URLs (authorize, token, userinfo) using OpenID metadata
-CONF_URL = 'https://accounts.google.com/.well-known/openid-configuration'
+# Metadata and signing keys cached in memory and on disk (see oidc_cache.py)
+CONF_URL = os.environ.get('GOOGLE_DISCOVERY_URL', 'https://accounts.google.com/.well-known/openid-configuration')
 oauth.register(
     name='google',
     client_id=GOOGLE_CLIENT_ID,
     client_secret=GOOGLE_CLIENT_SECRET,
     server_metadata_url=CONF_URL,
-    client_kwargs={'scope': 'openid email profile'}
+    client_kwargs={'scope': 'openid email profile'},
+    client_cls=CachedOIDCApp
 )
 
 
@@ -73,9 +77,10 @@ def google_callback():
         try:
             cur.execute("INSERT INTO users (username, email, photo) VALUES (?, ?, ?)", (username, email, photo))
         except sqlite3.IntegrityError:
-            nickname = unique_username(username) # Make username unique
-            cur.execute("INSERT INTO users (username, email, photo) VALUES (?, ?, ?)", (nickname, email, photo))
+            username = unique_username(username) # Make username unique
+            cur.execute("INSERT INTO users (username, email, photo) VALUES (?, ?, ?)", (username, email, photo))
         db.commit()
+        taken_usernames.add(username)
 
         # Get latest info
         cur.execute("SELECT id, photo FROM users WHERE email = ?", (email,))
@@ -112,16 +117,21 @@ def signup():
         if username_fb != "" or password_fb != "":
             return render_template("signup.html", username_fb=username_fb, password_fb=password_fb)
         
+        # Catch taken names before paying for the password hash
+        if not taken_usernames.available(username):
+            return render_template("signup.html", username_fb="username taken")
+
         hashed = ph.hash(password)
         db = get_db()
         cur = db.cursor()
 
-        # Only update db if username is unique
+        # Only update db if username is unique (still enforced here: taken meanwhile)
         try:
             cur.execute("INSERT INTO users (username, hash) VALUES (?, ?)", (username, hashed))
             db.commit()
         except sqlite3.IntegrityError:
             return render_template("signup.html", username_fb="username taken")
+        taken_usernames.add(username)
         
         # Get latest info
         cur.execute("SELECT id, photo FROM users WHERE username = ?", (username,))
@@ -143,6 +153,15 @@ def signup():
     return render_template("signup.html")
 
 
+@auth_bp.route("/signup/check")
+def check_username():
+    """Tell the signup form whether a username is free (JSON)"""
+
+    username = (request.args.get("username") or "").strip()
+    available = bool(username) and taken_usernames.available(username)
+    return jsonify(username=username, available=available)
+
+
 @auth_bp.route("/login", methods=["GET", "POST"])
 def login():
     """Log user in via username"""
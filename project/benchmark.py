@@ -0,0 +1,239 @@
+import argparse
+import atexit
+import json
+import os
+import re
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from datetime import date, timedelta
+
+# Benchmark against scratch databases only: no background expiry, in-memory sessions
+os.environ.setdefault("EXPIRY_SCHEDULER", "0")
+os.environ.setdefault("SESSION_BACKEND", "memory")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from seed_data import TIERS, BENCH_USERS, HOT_EVENTS, empty_copy, seed_tier
+
+# Importing the app migrates and reads DATABASE: give it an empty scratch copy, never planit.db
+if not os.environ.get("DATABASE"):
+    _scratch = tempfile.mkdtemp(prefix="planit-bench-")
+    atexit.register(shutil.rmtree, _scratch, True)
+    os.environ["DATABASE"] = os.path.join(_scratch, "import.db")
+    empty_copy(os.environ["DATABASE"])
+
+import db_pool
+from app import app
+from invite_cache import invite_cache
+from page_cache import plan_cache
+from system_check import remove_events
+
+# Statements executed on pooled connections (counted through db_pool.on_connect)
+query_counter = {"n": 0}
+
+
+def count_queries(conn):
+    """Attach a statement counter to a new pooled connection"""
+
+    def trace(statement):
+        query_counter["n"] += 1
+
+    conn.set_trace_callback(trace)
+
+
+def summarize(name, latencies, queries, wall):
+    """Return percentile/throughput row for one scenario"""
+
+    ms = sorted(t * 1000 for t in latencies)
+    cuts = statistics.quantiles(ms, n=100) if len(ms) > 1 else ms * 99
+    return {
+        "scenario": name,
+        "requests": len(ms),
+        "p50_ms": round(cuts[49], 2),
+        "p95_ms": round(cuts[94], 2),
+        "p99_ms": round(cuts[98], 2),
+        "queries_per_req": round(queries / len(ms), 1),
+        "req_per_sec": round(len(ms) / wall, 1),
+    }
+
+
+def drive(client, name, calls, users=None):
+    """Run (method, url, data) calls through the test client, return summary row
+
+    users: optional user id per call, logged in (untimed) before that call
+    """
+
+    latencies = []
+    start_queries = query_counter["n"]
+    start = time.perf_counter()
+    for i, (method, url, data) in enumerate(calls):
+        if users is not None:
+            login(client, users[i])
+        t = time.perf_counter()
+        response = client.open(url, method=method, data=data)
+        latencies.append(time.perf_counter() - t)
+        if response.status_code >= 500:
+            raise RuntimeError(f"{name}: {method} {url} returned {response.status_code}")
+    wall = time.perf_counter() - start
+    return summarize(name, latencies, query_counter["n"] - start_queries, wall)
+
+
+def page_weight(client, url):
+    """Requests/bytes for a first and a repeat view of url plus its /static assets
+
+    Repeat view acts like a browser cache: immutable assets are reused, others are
+    revalidated with If-None-Match (a 304 costs a request but no body).
+    """
+
+    page = client.get(url)
+    assets = sorted(set(re.findall(r'(?:src|href)="(/static/[^"]+)"', page.get_data(as_text=True))))
+    first = {"requests": 1 + len(assets), "bytes": len(page.data)}
+    repeat = {"requests": 1, "bytes": len(client.get(url).data)}
+    for asset in assets:
+        response = client.get(asset)
+        first["bytes"] += len(response.data)
+        if "immutable" in response.headers.get("Cache-Control", ""):
+            continue
+        etag = response.headers.get("ETag")
+        again = client.get(asset, headers={"If-None-Match": etag} if etag else {})
+        repeat["requests"] += 1
+        repeat["bytes"] += len(again.data)
+    return {"assets": len(assets), "first": first, "repeat": repeat}
+
+
+def login(client, user_id):
+    """Put user_id in the test client's session"""
+
+    with client.session_transaction() as session:
+        session["user_id"] = user_id
+        session["user_photo"] = "/static/uploads/default.png"
+
+
+def run_tier(tier, requests, workdir):
+    """Seed one tier and benchmark every route plus the expiry sweep"""
+
+    db_file = os.path.join(workdir, f"bench_{tier}.db")
+    start = time.perf_counter()
+    rows = seed_tier(db_file, tier)
+    print(f"\n== {tier}: {rows['total']} rows seeded in {time.perf_counter() - start:.1f}s")
+
+    app.config["DATABASE"] = db_file
+    app.config["TESTING"] = True
+    # Every tier reuses ids and tok%08d tokens: nothing cached from the previous tier may hit
+    invite_cache.clear()
+    plan_cache.clear()
+    client = app.test_client()
+    users = TIERS[tier]["users"]
+    events = TIERS[tier]["events"]
+    today = date.today()
+
+    db = sqlite3.connect(db_file)
+    # Heaviest user (most created/answered events) for the dashboard
+    heavy_user = db.execute("""SELECT user_id, COUNT(*) AS n FROM (
+                                   SELECT creator_id AS user_id FROM events
+                                   UNION ALL SELECT user_id FROM responses)
+                               GROUP BY user_id ORDER BY n DESC LIMIT 1""").fetchone()[0]
+    confirmed = [row[0] for row in db.execute("""SELECT i.token FROM events e JOIN invites i ON i.event_id = e.id
+                                                  WHERE e.status_id = 1 LIMIT ?""", (requests,))]
+    focus = db.execute("SELECT focus_label FROM event_focuses LIMIT 1").fetchone()[0]
+    setting = db.execute("SELECT setting_label FROM event_settings LIMIT 1").fetchone()[0]
+    db.close()
+
+    results = []
+
+    login(client, heavy_user)
+    results.append(drive(client, "dashboard", [("GET", "/", None)] * requests))
+    weight = page_weight(client, "/")
+
+    # Each bench user answers one never-filling hot event
+    rsvp_get, rsvp_post = [], []
+    for i in range(min(requests, BENCH_USERS)):
+        token = f"tok{events + 1 + i % HOT_EVENTS:08d}"
+        rsvp_get.append(("GET", f"/rsvp/{token}", None))
+        rsvp_post.append(("POST", f"/rsvp/{token}", {
+            "confirm": "1",
+            "date": [(today + timedelta(days=d)).isoformat() for d in (11, 12, 13)],
+        }))
+    bench_users = [users + 1 + i for i in range(len(rsvp_get))]
+    results.append(drive(client, "respond_event GET", rsvp_get, bench_users))
+    results.append(drive(client, "respond_event POST", rsvp_post, bench_users))
+
+    login(client, heavy_user)
+    form = {
+        "focus": focus,
+        "setting": setting,
+        "start-date": (today + timedelta(days=1)).isoformat(),
+        "end-date": (today + timedelta(days=8)).isoformat(),
+        "topic": ["Lunch", "Games"],
+        "ideas[0][]": ["Pizza", "Sushi"],
+        "ideas[1][]": ["Bowling"],
+        "min-participants": "2",
+        "max-participants": "6",
+    }
+    results.append(drive(client, "create_event POST", [("POST", "/create-event", form)] * requests))
+
+    if confirmed:
+        # First pass confirms activities, second pass is the steady state
+        results.append(drive(client, "schedule_event (first view)", [("GET", f"/scheduled/{t}", None) for t in confirmed]))
+        results.append(drive(client, "schedule_event", [("GET", f"/scheduled/{t}", None) for t in confirmed]))
+
+    with app.app_context():
+        queries = query_counter["n"]
+        sweep = remove_events()
+        results.append({
+            "scenario": "system_check sweep",
+            "requests": sweep["processed"],
+            "p50_ms": None, "p95_ms": None, "p99_ms": None,
+            "queries_per_req": round((query_counter["n"] - queries) / max(sweep["processed"], 1), 2),
+            "req_per_sec": sweep["events_per_sec"],
+        })
+
+    return {"tier": tier, "rows": rows, "results": results, "dashboard_weight": weight,
+            "plan_cache": plan_cache.stats(), "invite_cache": invite_cache.stats()}
+
+
+def print_report(report):
+    """Print one tier's results as a table"""
+
+    print(f"{'scenario':<28}{'n':>6}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}{'per sec':>10}")
+    for row in report["results"]:
+        cells = [row["p50_ms"], row["p95_ms"], row["p99_ms"]]
+        cells = [f"{c:>9.2f}" if c is not None else f"{'-':>9}" for c in cells]
+        print(f"{row['scenario']:<28}{row['requests']:>6}{''.join(cells)}"
+              f"{row['queries_per_req']:>9}{row['req_per_sec']:>10}")
+    weight = report["dashboard_weight"]
+    print(f"dashboard view ({weight['assets']} static assets): "
+          f"first {weight['first']['requests']} requests / {weight['first']['bytes']} bytes, "
+          f"repeat {weight['repeat']['requests']} requests / {weight['repeat']['bytes']} bytes")
+    cache = report["plan_cache"]
+    print(f"plan cache: {cache['hits']} hits / {cache['misses']} misses (hit rate {cache['hit_rate']:.0%}), "
+          f"{cache['entries']} entries, {cache['bytes']} bytes")
+    cache = report["invite_cache"]
+    print(f"invite cache: {cache['hits']} hits / {cache['misses']} misses (hit rate {cache['hit_rate']:.0%}), "
+          f"{cache['invalidations']} invalidations")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="End-to-end performance benchmark on synthetic data")
+    parser.add_argument("--tiers", default="small", help="comma separated: " + ",".join(TIERS))
+    parser.add_argument("--requests", type=int, default=100, help="requests per scenario")
+    parser.add_argument("--workdir", help="keep scratch databases here (default: temp dir)")
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    db_pool.on_connect.append(count_queries)
+    reports = []
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or tmp
+        os.makedirs(workdir, exist_ok=True)
+        for tier in args.tiers.split(","):
+            report = run_tier(tier.strip(), args.requests, workdir)
+            print_report(report)
+            reports.append(report)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2)
@@ -0,0 +1,49 @@
+import argparse
+import json
+import sys
+import time
+
+from app import app
+from helpers import get_db, close_db, validate_event_specs, create_events
+
+def bulk_create(creator_id, specs):
+    """Validate and insert specs in one transaction, return (created, errors, seconds)"""
+
+    # Ensure creator exists before writing anything
+    cur = get_db().cursor()
+    cur.execute("SELECT 1 FROM users WHERE id = ?", (creator_id,))
+    if not cur.fetchone():
+        return [], [{"index": None, "errors": {"creator": "user not found"}}], 0.0
+
+    cleaned, errors = validate_event_specs(specs)
+    if errors:
+        return [], errors, 0.0
+
+    start = time.perf_counter()
+    created = create_events(creator_id, cleaned)
+    return created, [], time.perf_counter() - start
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create many events from a JSON file of specs")
+    parser.add_argument("specs", help='JSON file: [{"focus", "setting", "start_date", "end_date", '
+                                      '"topics": [{"topic", "ideas": [...]}], "min_participants", "max_participants"}]')
+    parser.add_argument("--creator", type=int, required=True, help="user id of the creator")
+    parser.add_argument("--base-url", default="", help="prefix for printed invite links")
+    args = parser.parse_args()
+
+    with open(args.specs, encoding="utf-8") as f:
+        payload = json.load(f)
+    specs = payload.get("events", []) if isinstance(payload, dict) else payload
+
+    with app.app_context():
+        created, errors, elapsed = bulk_create(args.creator, specs)
+        close_db()
+
+    if errors:
+        json.dump(errors, sys.stderr, indent=2, ensure_ascii=False)
+        sys.exit(1)
+
+    for event_id, token, expires_at in created:
+        print(f"{event_id}\t{args.base_url}/rsvp/{token}\t{expires_at}")
+    rate = len(created) / elapsed if elapsed > 0 else 0
+    print(f"created {len(created)} event(s) in {elapsed:.3f}s ({rate:.1f} events/s)", file=sys.stderr)
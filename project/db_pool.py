@@ -0,0 +1,184 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+# Adapted from: SQLite documentation - Write-Ahead Logging / PRAGMA statements
+# URL: https://www.sqlite.org/wal.html
+# URL: https://www.sqlite.org/pragma.html
+# Pragmas applied to every new connection
+PRAGMAS = {
+    "busy_timeout": 5000,       # Wait up to 5s for the writer lock instead of failing
+    "synchronous": "NORMAL",    # Safe with WAL, skips an fsync per commit
+    "cache_size": -16000,       # Negative = KiB (~16MB page cache per connection)
+    "mmap_size": 134217728,     # Memory-map up to 128MB of the db file
+    "temp_store": "MEMORY",
+}
+
+# Callbacks run on every new connection, e.g. to attach tracing (see benchmark.py)
+on_connect = []
+
+
+class ConnectionPool:
+    """Reuse sqlite3 connections for one db file across requests (per worker)"""
+
+    def __init__(self, db_path, size=5, timeout=5.0, read_only=False):
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self.read_only = read_only
+
+        # Most recently returned connection first (warmest page cache)
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self._created = 0
+
+        # Counters exposed via stats()
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.wait_time = 0.0
+
+    def _connect(self):
+        """Open a new connection with row access by column name and tuned pragmas"""
+
+        if self.read_only:
+            # Adapted from: Python documentation - sqlite3 URIs
+            # URL: https://docs.python.org/3/library/sqlite3.html#sqlite3-uri-tricks
+            uri = f"file:{self.db_path}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row  # Enable access via column names like CS50 SQL
+
+        for name, value in PRAGMAS.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        for callback in on_connect:
+            callback(conn)
+        return conn
+
+    def acquire(self):
+        """Get an idle connection, open one if below size, else wait for one"""
+
+        try:
+            conn = self._idle.get_nowait()
+            with self._lock:
+                self.hits += 1
+            return conn
+        except queue.Empty:
+            pass
+
+        # Pool not full yet, open a new connection
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                self.misses += 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                return self._connect()
+            except sqlite3.Error:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        # Pool exhausted, wait for a connection to be returned
+        start = time.perf_counter()
+        try:
+            conn = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            conn = None
+        waited = time.perf_counter() - start
+
+        with self._lock:
+            self.waits += 1
+            self.wait_time += waited
+            if conn is None:
+                self.timeouts += 1
+
+        if conn is None:
+            raise RuntimeError(f"No database connection available after {self.timeout}s")
+        return conn
+
+    def release(self, conn):
+        """Return connection to the pool (discard it if broken)"""
+
+        try:
+            # Never hand over a half-finished transaction to the next request
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put_nowait(conn)
+        except (sqlite3.Error, queue.Full):
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+    def close_all(self):
+        """Close every idle connection (used on shutdown/fork)"""
+
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+    def stats(self):
+        """Return pool counters as a dict"""
+
+        with self._lock:
+            return {
+                "mode": "ro" if self.read_only else "rw",
+                "size": self.size,
+                "open": self._created,
+                "idle": self._idle.qsize(),
+                "hits": self.hits,
+                "misses": self.misses,
+                "waits": self.waits,
+                "timeouts": self.timeouts,
+                "wait_time": round(self.wait_time, 6),
+            }
+
+
+# Pools are per process so forked workers never share a connection
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path, read_only=False, size=5, timeout=5.0):
+    """Return the pool for db_path in this worker, create it on first use"""
+
+    key = (os.getpid(), db_path, read_only)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                enable_wal(db_path)
+                pool = ConnectionPool(db_path, size=size, timeout=timeout, read_only=read_only)
+                _pools[key] = pool
+    return pool
+
+
+def enable_wal(db_path):
+    """Switch db to WAL journal mode (persistent, stored in the db file)"""
+
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("PRAGMA busy_timeout = 5000")
+        conn.execute("PRAGMA journal_mode = WAL")
+    finally:
+        conn.close()
+
+
+def pool_stats():
+    """Return stats of every pool opened by this worker"""
+
+    pid = os.getpid()
+    return [pool.stats() for (owner, _, _), pool in _pools.items() if owner == pid]
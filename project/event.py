@@ -1,85 +1,75 @@
-import uuid
+import time
 
 from datetime import datetime, date, timedelta
-from flask import Blueprint, render_template, request, redirect, session, flash, url_for
-from helpers import login_required, show_error, get_db, choose_activities, removal_check, responses_check
+from flask import Blueprint, render_template, request, redirect, session, flash, url_for, jsonify, current_app, Response
+from event_watch import event_changes
+from push import push_broker
+from lookups import lookups
+from page_cache import plan_cache
+from helpers import login_required, show_error, get_db, get_read_db, close_db, load_event_status, resolve_invite, with_labels, load_dashboard, parse_cursor, validate_event, validate_event_specs, create_events, choose_activities, responses_check
 
 # Adapted from: Real Python
 # URL: https://realpython.com/flask-blueprint/
 # Define blueprint for all event routes
 event_bp = Blueprint("event", __name__)
 
+# Upper bound on specs accepted by /api/events/bulk in one request
+MAX_BULK_EVENTS = 500
+
+# Longest a status request may be parked (seconds)
+MAX_POLL_WAIT = 30
+
 
 @event_bp.route("/")
 @login_required
 def dashboard():
     """Show events and their statuses"""
 
-    db = get_db()
-    cur = db.cursor()
     user_id = session["user_id"]
 
-    # All events associated with user
-    # Query adjusted by ChatGPT (OpenAI)
-    cur.execute("""
-                   SELECT DISTINCT e.*, s.status_label
-                   FROM events e
-                   JOIN event_statuses s ON e.status_id = s.id
-                   LEFT JOIN invites i ON e.id = i.event_id
-                   LEFT JOIN responses r ON i.id = r.invite_id
-                   WHERE e.creator_id = ? OR r.user_id = ?
-                   ORDER BY e.created_at DESC""", (user_id, user_id))
-    events = cur.fetchall()
+    # Optional status filter (?status=ongoing|confirmed|cancelled) applied in SQL
+    status = (request.args.get("status") or "").lower()
+    status_id = next((lookups.id("status", label) for label in lookups.labels("status") if label.lower() == status), None)
+    if status_id is None:
+        status = ""
+
+    # One page of events associated with user (invite, response count and user's res included)
+    events, next_cursor = load_dashboard(user_id, status_id, parse_cursor(request.args.get("after")),
+                                         current_app.config.get("DASHBOARD_PAGE_SIZE", 24))
 
     plans = []
     for event in events:
-        # Get invite id
-        cur.execute("SELECT id, token, expires_at FROM invites WHERE event_id = ?", (event["id"],))
-        invite = cur.fetchone()
-
-        response_count = 0
         expected_total = event["expected_total"]
-        expires_at = date.fromisoformat(invite["expires_at"])
-
-        # Safety check in case the scheduled cleanup missed
-        if expires_at <= date.today():
-            removal_check(event["id"])
+        expires_at = date.fromisoformat(event["expires_at"])
 
         # Get details from valid event
-        else:
-            # Get responses via invite id
-            cur.execute("SELECT res, user_id FROM responses WHERE invite_id = ?", (invite["id"],))
-            responses = cur.fetchall()
-
-            # Responses count and user specific response
-            response_count = sum(1 for r in responses if r["res"] is not None)              # Add 1 for every response that is not pending
-            user_res = next((r["res"] for r in responses if r["user_id"] == user_id), None) # Get res from responses where user id matches
-
-            chosen_date = None
-            countdown = 0
-            # Adapted from: GeeksforGeeks
-            # URL: https://www.geeksforgeeks.org/python/python-program-to-find-number-of-days-between-two-given-dates/
-            # Countdown until expiry (event is ongoing)
-            if event["status_id"] == 0:
-                countdown = (expires_at - date.today()).days
-            # Countdown until chosen date (event is confirmed)
-            elif event["status_id"] == 1:
-                chosen_date = date.fromisoformat(event["chosen_date"])
-                countdown = (chosen_date - date.today()).days
-
-            plans.append ({
-                "id": event["id"],
-                "creator_id": event["creator_id"],
-                "token": invite["token"],
-                "status": event["status_label"],
-                "invitees": expected_total,
-                "responses": response_count,
-                "user_res": user_res,
-                "chosen_date": chosen_date,
-                "countdown": countdown
-            })
-
-    return render_template("dashboard.html", plans=plans)
+        chosen_date = None
+        countdown = 0
+        # Adapted from: GeeksforGeeks
+        # URL: https://www.geeksforgeeks.org/python/python-program-to-find-number-of-days-between-two-given-dates/
+        # Countdown until expiry (event is ongoing)
+        if event["status_id"] == 0:
+            countdown = (expires_at - date.today()).days
+        # Countdown until chosen date (event is confirmed)
+        elif event["status_id"] == 1:
+            chosen_date = date.fromisoformat(event["chosen_date"])
+            countdown = (chosen_date - date.today()).days
+
+        plans.append ({
+            "id": event["id"],
+            "creator_id": event["creator_id"],
+            "token": event["token"],
+            "status": lookups.label("status", event["status_id"]),
+            "invitees": expected_total,
+            "responses": event["response_count"],
+            "user_res": event["user_res"],
+            "chosen_date": chosen_date,
+            "countdown": countdown
+        })
+
+    return render_template("dashboard.html", plans=plans, status=status, next_cursor=next_cursor,
+                           push_enabled=current_app.config.get("PUSH_ENABLED", False),
+                           statuses=lookups.labels("status"), first_page=not request.args.get("after"))
 
 
 @event_bp.route("/create-event", methods=["GET", "POST"])
@@ -87,127 +77,41 @@ def dashboard():
 def create_event():
     """Let user configure and create event"""
 
-    db = get_db()
-    cur = db.cursor()
     creator_id = session["user_id"]
 
-    # Get options
-    cur.execute("SELECT focus_label FROM event_focuses")
-    focuses = [row["focus_label"] for row in cur.fetchall()]
-
-    cur.execute("SELECT setting_label FROM event_settings")
-    settings = [row["setting_label"] for row in cur.fetchall()]
+    # Get options (process-wide cache, no queries)
+    focuses = lookups.labels("focus")
+    settings = lookups.labels("setting")
 
     if request.method == "POST":
-        
-        focus_fb = setting_fb = date_fb = table_fb = limit_fb = max_fb = ""
-        # ---------------- Section 1 -------------------
-        focus = request.form.get("focus")
-        setting = request.form.get("setting")
-
-        # Ensure selected options exist
-        if focus not in focuses:
-            focus_fb = "invalid option"
-        elif setting not in settings:
-            setting_fb = "invalid option"
-
-        # ---------------- Section 2 -------------------
-        today = date.today()
-        date1 = request.form.get("start-date")
-        date2 = request.form.get("end-date")
-
-        # Validate date format/range
-        try:
-            start_date = date.fromisoformat(date1)
-            end_date = date.fromisoformat(date2)
-            if start_date < today or end_date <= today or end_date <= start_date:
-                date_fb = "invalid range"
-        except ValueError:
-            date_fb = "invalid date"
-
-        # ---------------- Section 3 -------------------
-        topics = [t.strip() for t in request.form.getlist("topic") if t.strip()]  # Add only non-empty to list
-
-        # Ensure at least 1 but no more than 5 topics
-        if not topics:
-            table_fb = "min 1 activity"
-        elif len(topics) > 5:
-            table_fb = "max 5 activities"
-
-        topic_ideas = {}
-        for i, topic in enumerate(topics):
-            # Formatting decision: Reddit
-            # URL: https://www.reddit.com/r/learnpython/comments/1gzhfno/whats_better_to_use_fstring_or_format/
-            # Answered by MiniMages
-            idea_list = request.form.getlist(f"ideas[{i}][]")
-            filtered = [idea.strip() for idea in idea_list if idea.strip()][:2]  # Accept only 2 per topic, Discard empty if any
-            # Ensure 1 idea per topic before adding
-            if not filtered:
-                table_fb = "min 1 option per activity"
-            topic_ideas[i] = filtered
-
-        # ---------------- Section 4 -------------------
-        # Ensure it is positive integer
-        try:
-            pass_limit = int(request.form.get("min-participants"))
-            if pass_limit < 1:
-                raise ValueError
-        except (ValueError, TypeError):
-            limit_fb = "invalid number"
-
-        # Ensure it is positive integer >= pass limit
-        try:
-            expected_total = int(request.form.get("max-participants"))
-            if expected_total < pass_limit:
-                raise ValueError
-        except (ValueError, TypeError):
-            max_fb = "invalid number"
+        # Formatting decision: Reddit
+        # URL: https://www.reddit.com/r/learnpython/comments/1gzhfno/whats_better_to_use_fstring_or_format/
+        # Answered by MiniMages
+        raw_topics = request.form.getlist("topic")
+        feedback, spec = validate_event(
+            focus=request.form.get("focus"),
+            setting=request.form.get("setting"),
+            start_date=request.form.get("start-date"),
+            end_date=request.form.get("end-date"),
+            topics=raw_topics,
+            idea_lists=[request.form.getlist(f"ideas[{i}][]") for i in range(len(raw_topics))],
+            min_participants=request.form.get("min-participants"),
+            max_participants=request.form.get("max-participants")
+        )
 
         # ---------------- Early return if any feedback exists -------------------
-        if any([focus_fb, setting_fb, date_fb, table_fb, limit_fb, max_fb]):
+        if any(feedback.values()):
             return render_template("create_event.html",
                 focuses=focuses,
                 settings=settings,
-                focus_fb=focus_fb,
-                setting_fb=setting_fb,
-                date_fb=date_fb,
-                table_fb=table_fb,
-                limit_fb=limit_fb,
-                max_fb=max_fb,
-                topics=topics,
-                topic_ideas=topic_ideas
+                topics=spec["topics"],
+                topic_ideas=spec["topic_ideas"],
+                **feedback
             )
-        
+
         # ---------------- DB queries -------------------
-        # Insert event and get id
-        cur.execute("""
-                       INSERT INTO events (creator_id, focus_id, setting_id, start_date, end_date, pass_limit, expected_total)
-                       VALUES (
-                           ?,
-                           (SELECT id FROM event_focuses WHERE focus_label = ?),
-                           (SELECT id FROM event_settings WHERE setting_label = ?),
-                           ?, ?, ?, ?)""", (creator_id, focus, setting, start_date, end_date, pass_limit, expected_total))
-        event_id = cur.lastrowid
-
-        # Insert topics, topic_ideas from Section 3
-        for i, topic in enumerate(topics):
-            cur.execute("INSERT INTO activity_topics (event_id, topic) VALUES (?, ?)", (event_id, topic))
-            topic_id = cur.lastrowid
-            for idea in topic_ideas[i]:
-                cur.execute("INSERT INTO activity_ideas (topic_id, user_id, idea) VALUES (?, ?, ?)", (topic_id, creator_id, idea))
-
-        # Generate invite token (expires after a week)
-        invite_token = uuid.uuid4().hex
-        expires_at = date.today() + timedelta(days=7) # Testing 1 - Change to 7 for production
-
-        # insert invite and get id
-        cur.execute("""INSERT INTO invites (event_id, creator_id, token, expires_at)
-                       VALUES (?, ?, ?, ?)""", (event_id, creator_id, invite_token, expires_at))
-        invite_id = cur.lastrowid
-
-        # Creator auto-confirm
-        cur.execute("INSERT INTO responses (invite_id, user_id, res) VALUES (?, ?, ?)", (invite_id, creator_id, 1))
-        db.commit() # Commit all changes
+        # Insert event, topics, ideas, invite and creator response in one transaction
+        [(event_id, invite_token, expires_at)] = create_events(creator_id, [spec])
 
         # Return invite link
         invite_link = url_for("event.respond_event", token=invite_token, _external=True)
@@ -217,6 +121,114 @@ def create_event():
     return render_template("create_event.html", focuses=focuses, settings=settings)
 
 
+@event_bp.route("/api/events/bulk", methods=["POST"])
+@login_required
+def bulk_create_events():
+    """Create many events from a JSON list of specs, return all invite links"""
+
+    payload = request.get_json(silent=True)
+    # Accept a bare list or {"events": [...]}
+    specs = payload.get("events") if isinstance(payload, dict) else payload
+    if not isinstance(specs, list) or not specs:
+        return jsonify(error="expected a non-empty JSON list of events"), 400
+    if len(specs) > MAX_BULK_EVENTS:
+        return jsonify(error=f"max {MAX_BULK_EVENTS} events per request"), 400
+
+    # Validate everything first, write nothing if any spec is invalid
+    cleaned, errors = validate_event_specs(specs)
+    if errors:
+        return jsonify(errors=errors), 400
+
+    start = time.perf_counter()
+    created = create_events(session["user_id"], cleaned)
+    elapsed = time.perf_counter() - start
+
+    return jsonify(
+        created=len(created),
+        events=[{
+            "event_id": event_id,
+            "invite_link": url_for("event.respond_event", token=token, _external=True),
+            "expires_at": expires_at.isoformat()
+        } for event_id, token, expires_at in created],
+        seconds=round(elapsed, 4),
+        events_per_sec=round(len(created) / elapsed, 1) if elapsed > 0 else None
+    ), 201
+
+
+@event_bp.route("/api/events/<token>/status")
+@login_required
+def event_status(token):
+    """Event status and RSVP counts as JSON, ETag per change version
+
+    With If-None-Match set to the current ETag and ?wait=<seconds>, the request is
+    parked until the event changes (200) or the wait runs out (304). Without
+    LONGPOLL_MAX_WAITERS (or with that many already parked) it answers at once.
+    """
+
+    event = load_event_status(token)
+    if event is None:
+        return jsonify(error="event not found"), 404
+
+    event_id, version = event["id"], event["version"]
+    wait = min(request.args.get("wait", 0, type=float), MAX_POLL_WAIT)
+    if wait > 0 and event_changes.max_waiters > 0 and request.if_none_match.contains(f"{event_id}-{version}"):
+        # Don't hold pooled connections while parked
+        close_db()
+
+        def changed():
+            nonlocal event
+            event = load_event_status(token)
+            close_db()
+            return event is None or event["version"] != version
+
+        event_changes.wait(event_id, changed, wait)
+        if event is None:
+            return jsonify(error="event not found"), 404
+
+    etag = f"{event['id']}-{event['version']}"
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = jsonify(
+            event_id=event["id"],
+            version=event["version"],
+            status=lookups.label("status", event["status_id"]).lower(),
+            confirmed=event["confirm_count"],
+            declined=event["decline_count"],
+            pending=event["pending_count"],
+            expected_total=event["expected_total"],
+            pass_limit=event["pass_limit"],
+            chosen_date=event["chosen_date"],
+            expires_at=event["expires_at"]
+        )
+    response.set_etag(etag)
+    # Clients revalidate every time (never stored as a stale copy)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+@login_required
+def event_stream():
+    """Server-Sent Events: live status/counts of every event linked to the user"""
+
+    sub = push_broker.subscribe(session["user_id"])
+    if sub is None:
+        return jsonify(error="too many live connections, poll /api/events/<token>/status instead"), 503
+
+    response = Response(push_broker.stream(sub), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"  # Don't let a proxy buffer the stream
+    return response
+
+
+# Each open stream holds a worker thread for as long as the tab stays open, so the
+# route only exists with PUSH_ENABLED (needs threaded/async workers, not sync uWSGI)
+@event_bp.record
+def register_event_stream(state):
+    if state.app.config.get("PUSH_ENABLED"):
+        state.add_url_rule("/api/stream", view_func=event_stream)
+
+
 @event_bp.route("/rsvp/<token>", methods=["GET", "POST"])
 def respond_event(token):
     """Let user respond to valid rsvp form via invite link"""
@@ -229,28 +241,20 @@ def respond_event(token):
 
     db = get_db()
     cur = db.cursor()
-    cur.execute("SELECT * FROM invites WHERE token = ?", (token,))
-    invite = cur.fetchone()
+    # Invite, event, creator and topics (cached per token, re-read on submit)
+    invite = resolve_invite(token, fresh=request.method == "POST")
     # Validate invite
     if not invite:
         return show_error("Invalid/Expired invite.")
 
-    invite_id = invite["id"]
+    invite_id = invite["invite_id"]
     event_id = invite["event_id"]
     creator_id = invite["creator_id"]
 
-    # Event and related labels
-    cur.execute("""
-                   SELECT e.*, f.focus_label, s.setting_label, u.username
-                   FROM events e
-                   JOIN event_focuses f ON e.focus_id = f.id
-                   JOIN event_settings s ON e.setting_id = s.id
-                   JOIN users u ON e.creator_id = u.id
-                   WHERE e.id = ?""", (event_id,))
-    event = cur.fetchone()
-    # Ensure event exists
-    if not event:
+    # Ensure event and creator exist
+    if invite["event"] is None or invite["event"]["username"] is None:
         return show_error("Event/Creator not found.")
+    event = with_labels(invite["event"])
 
     status = event["status_id"]
     # Handle confirmed/cancelled events
@@ -260,8 +264,7 @@ def respond_event(token):
         return show_error("Event cancelled.")
 
     # Set up ongoing event
-    cur.execute("SELECT * FROM activity_topics WHERE event_id = ?", (event_id,))
-    topics = cur.fetchall()
+    topics = invite["topics"]
     cur.execute("SELECT res FROM responses WHERE invite_id = ? AND user_id = ?", (invite_id, user_id))
     user = cur.fetchone()
 
@@ -323,21 +326,12 @@ def respond_event(token):
                     date_fb=date_fb
                 )
                     
-            for input_date in valid_dates:
-                cur.execute(
-                    """INSERT INTO event_dates (event_id, user_id, date)
-                       SELECT ?, ?, ? WHERE NOT EXISTS (
-                           SELECT 1 FROM event_dates
-                           WHERE event_id = ? AND user_id = ? AND date = ?
-                       )""",
-                    (event_id, user_id, input_date, event_id, user_id, input_date)
-                )
-
-            # Insert non-empty ideas
-            for topic in topics:
-                idea = request.form.get(f"idea_{topic['id']}", "").strip()
-                if idea:
-                    cur.execute("INSERT INTO activity_ideas (topic_id, user_id, idea) VALUES (?, ?, ?)", (topic['id'], user_id, idea))
+            # Insert dates (duplicates skipped by unique index) and non-empty ideas in one go
+            cur.executemany("INSERT OR IGNORE INTO event_dates (event_id, user_id, date) VALUES (?, ?, ?)",
+                            [(event_id, user_id, input_date) for input_date in valid_dates])
+            ideas = [(topic["id"], user_id, request.form.get(f"idea_{topic['id']}", "").strip()) for topic in topics]
+            cur.executemany("INSERT INTO activity_ideas (topic_id, user_id, idea) VALUES (?, ?, ?)",
+                            [idea for idea in ideas if idea[2]])
 
             # Update user response and call system check
             cur.execute("UPDATE responses SET res = 1 WHERE invite_id = ? AND user_id = ?", (invite_id, user_id))
@@ -356,26 +350,20 @@ def respond_event(token):
 def show_response(token):
     """Display user responses"""
 
-    db = get_db()
+    db = get_read_db()
     cur = db.cursor()
     user_id = session["user_id"]
+    invite = resolve_invite(token)
     # Get user's response to this event
-    cur.execute("""
-                   SELECT r.res FROM responses r
-                   JOIN invites i ON r.invite_id = i.id
-                   WHERE i.token = ? AND r.user_id = ?""", (token, user_id))
-    response = cur.fetchone()
+    response = None
+    if invite:
+        cur.execute("SELECT res FROM responses WHERE invite_id = ? AND user_id = ?", (invite["invite_id"], user_id))
+        response = cur.fetchone()
     # Ensure response exists
     if not response:
         return show_error("Response not found for this user.")
 
-    # Find event id
-    cur.execute("""
-                   SELECT e.id, e.start_date, e.end_date
-                   FROM invites i
-                   JOIN events e ON i.event_id = e.id
-                   WHERE i.token = ?""", (token,))
-    event = cur.fetchone()
+    event = invite["event"]
     # Ensure event exists
     if not event:
         return show_error("Event not found.")
@@ -409,38 +397,48 @@ def schedule_event(token):
 
     db = get_db()
     cur = db.cursor()
-    # Find event details
-    cur.execute("""
-                   SELECT e.*, f.focus_label, s.setting_label
-                   FROM invites i
-                   JOIN events e ON i.event_id = e.id
-                   JOIN event_focuses f ON e.focus_id = f.id
-                   JOIN event_settings s ON e.setting_id = s.id
-                   WHERE i.token = ?""", (token,))
-    event = cur.fetchone()
+    # Find event details (token resolved through the invite cache, row read fresh for plan_version)
+    invite = resolve_invite(token)
+    event = None
+    if invite:
+        cur.execute("SELECT * FROM events WHERE id = ?", (invite["event_id"],))
+        event = cur.fetchone()
     # Ensure event exists
     if not event:
         return show_error("Event not found.")
     event_id = event["id"]
 
-    # Choose activities if not yet decided
-    cur.execute("SELECT topic_label, activity_label FROM confirmed_activities WHERE event_id = ?", (event_id,))
-    activities = cur.fetchall()
+    # Confirmed plan only changes with plan_version (attendees, see migrations/0009)
+    # or relabelled lookups, so reuse its rendered html until either moves
+    version = (event["plan_version"], lookups.version)
+    plan = plan_cache.get(event_id, version) if event["status_id"] == 1 else None
+    if plan is None:
+        event = with_labels(event)
 
-    if not activities:
-        choose_activities(event_id)
-        # Get latest insert
+        # Activities decided when event was confirmed
         cur.execute("SELECT topic_label, activity_label FROM confirmed_activities WHERE event_id = ?", (event_id,))
         activities = cur.fetchall()
 
-    # Get attendee details
-    cur.execute("""
-                   SELECT u.id, u.username, u.photo
-                   FROM responses r
-                   JOIN invites i ON r.invite_id = i.id
-                   JOIN users u ON r.user_id = u.id
-                   WHERE i.event_id = ? AND r.res = 1""", (event_id,))
-    attendees = cur.fetchall()
-
-    return render_template("scheduled.html", event=event, activities=activities, attendees=attendees)
+        # Activities are picked on confirmation, fallback for events confirmed before that
+        if not activities:
+            choose_activities(event_id)
+            db.commit()
+            # Get latest insert
+            cur.execute("SELECT topic_label, activity_label FROM confirmed_activities WHERE event_id = ?", (event_id,))
+            activities = cur.fetchall()
+
+        # Get attendee details
+        cur.execute("""
+                       SELECT u.id, u.username, u.photo
+                       FROM responses r
+                       JOIN invites i ON r.invite_id = i.id
+                       JOIN users u ON r.user_id = u.id
+                       WHERE i.event_id = ? AND r.res = 1""", (event_id,))
+        attendees = cur.fetchall()
+
+        plan = render_template("scheduled_plan.html", event=event, activities=activities, attendees=attendees)
+        if event["status_id"] == 1 and activities:
+            plan_cache.set(event_id, version, plan)
+
+    return render_template("scheduled.html", plan=plan)
 
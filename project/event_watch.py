@@ -0,0 +1,79 @@
+import threading
+import time
+
+
+class EventChanges:
+    """Wake long-poll requests parked on an event when this worker changes it
+
+    Changes committed by other worker processes aren't signalled, so waiters also
+    wake every recheck seconds to compare the stored version themselves.
+    """
+
+    def __init__(self, max_waiters=0, recheck=2.0):
+        self.max_waiters = max_waiters
+        self.recheck = recheck
+        self._waiters = {}           # event_id -> set of threading.Event
+        self._count = 0
+        self._lock = threading.Lock()
+
+        # Counters exposed via stats()
+        self.notified = 0
+        self.rejected = 0
+
+    def notify(self, event_id):
+        """Wake every request waiting on event_id"""
+
+        with self._lock:
+            waiters = self._waiters.get(event_id, ())
+            for waiter in waiters:
+                waiter.set()
+            self.notified += len(waiters)
+
+    def wait(self, event_id, changed, timeout):
+        """Park until changed() is true or timeout, return changed() result
+
+        changed: callable re-reading the stored version (called on every wake-up)
+        Returns None without waiting when max_waiters requests are already parked
+        (always with max_waiters=0, long-polling off).
+        """
+
+        waiter = threading.Event()
+        with self._lock:
+            if self._count >= self.max_waiters:
+                self.rejected += 1
+                return None
+            self._waiters.setdefault(event_id, set()).add(waiter)
+            self._count += 1
+
+        try:
+            deadline = time.monotonic() + timeout
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return changed()
+                waiter.wait(min(remaining, self.recheck))
+                waiter.clear()
+                if changed():
+                    return True
+        finally:
+            with self._lock:
+                waiters = self._waiters.get(event_id)
+                waiters.discard(waiter)
+                if not waiters:
+                    del self._waiters[event_id]
+                self._count -= 1
+
+    def stats(self):
+        """Return waiter counters as a dict"""
+
+        with self._lock:
+            return {
+                "waiting": self._count,
+                "events": len(self._waiters),
+                "notified": self.notified,
+                "rejected": self.rejected,
+            }
+
+
+# Shared instance (one per worker process)
+event_changes = EventChanges()
@@ -1,14 +1,26 @@
+import base64
 import os
-import random, string
-import sqlite3
-
-from argon2 import PasswordHasher
-from collections import Counter
+import random
+import uuid
+
+from datetime import date, timedelta
+from db_pool import get_pool
+from event_watch import event_changes
+from invite_cache import invite_cache
+from push import push_broker
+from lookups import lookups
+from metrics import track_sql
+from page_cache import plan_cache
+from passwords import from_env as password_pool_from_env
+from photos import photo_files
+from scheduler import expiry_scheduler
+from usernames import taken_usernames
 from flask import redirect, render_template, session, g, flash, current_app
 from functools import wraps
 
 # Shared instance across blueprints
-ph = PasswordHasher() # Use default parameters
+# Hashing runs on a bounded worker pool, costs from ARGON2_* env vars (see passwords.py)
+ph = password_pool_from_env()
 
 
 def login_required(f):
@@ -33,31 +45,63 @@ def show_error(text):
     return render_template("error.html", text=text)
 
 
+def db_path():
+    """Return file path of planit.db for the current app"""
+
+    return current_app.config.get("DATABASE") or os.path.join(current_app.root_path, "planit.db")
+
+
+def _db_pool(read_only=False):
+    """Return this worker's connection pool (read-only or read-write)"""
+
+    size = current_app.config.get("DB_POOL_SIZE", 5)
+    timeout = current_app.config.get("DB_POOL_TIMEOUT", 5.0)
+    return get_pool(db_path(), read_only=read_only, size=size, timeout=timeout)
+
+
 # Adapted from Flask documentation:
 # URL: https://flask.palletsprojects.com/en/latest/patterns/sqlite3/
 # CS50 SQL → SQLite3 adaptation guidance by ChatGPT (OpenAI)
 def get_db():
-    """Store db connection for current request in Flask's g"""
+    """Store pooled read-write db connection for current request in Flask's g"""
 
-    # Creat connection if none
+    # Borrow connection from pool if none (statements timed for /metrics)
     if "db" not in g:
-        db_path = os.path.join(current_app.root_path, "planit.db")
-        g.db = sqlite3.connect(db_path)
-        g.db.row_factory = sqlite3.Row  # Enable access via column names like CS50 SQL
+        g.db = track_sql(_db_pool().acquire())
     return g.db
 
 
+def get_read_db():
+    """Store pooled read-only db connection for current request in Flask's g"""
+
+    # Reuse the read-write connection if request already has one (sees own writes)
+    if "db" in g:
+        return g.db
+    if "read_db" not in g:
+        g.read_db = track_sql(_db_pool(read_only=True).acquire())
+    return g.read_db
+
+
+# Lookup cache reads focuses/settings/statuses through a read-only connection
+lookups.connect = get_read_db
+# Username availability checks too
+taken_usernames.connect = get_read_db
+
+
 # Adapted from Flask documentation:
 # URL: https://flask.palletsprojects.com/en/latest/patterns/sqlite3/
 # CS50 SQL → SQLite3 adaptation guidance by ChatGPT (OpenAI)
 def close_db(error=None):
-    """Close the DB connection at the end"""
+    """Return the DB connections to the pool at the end"""
 
-    # Remove db connection from g if any
+    # Remove db connections from g if any
     db = g.pop("db", None)
-    # Close the connection if any (to free resources)
+    read_db = g.pop("read_db", None)
+    # Hand the connections back for the next request (rolls back uncommitted work)
     if db is not None:
-        db.close()
+        _db_pool().release(getattr(db, "raw", db))
+    if read_db is not None:
+        _db_pool(read_only=True).release(getattr(read_db, "raw", read_db))
 
 
 # Adapted from Flask documentation:
@@ -69,94 +113,426 @@ def db_teardown(app):
     app.teardown_appcontext(close_db)
 
 
-def schedule_plan(dates, pass_limit):
-    """Return an appropriate date picked"""
+def with_labels(event):
+    """Return event row as dict with focus/setting labels from the lookup cache"""
+
+    event = dict(event)
+    event["focus_label"] = lookups.label("focus", event["focus_id"])
+    event["setting_label"] = lookups.label("setting", event["setting_id"])
+    return event
+
+
+def validate_event(focus, setting, start_date, end_date, topics, idea_lists, min_participants, max_participants):
+    """Validate event options (form or JSON), return (feedback dict, cleaned spec)"""
+
+    feedback = dict.fromkeys(["focus_fb", "setting_fb", "date_fb", "table_fb", "limit_fb", "max_fb"], "")
+    # ---------------- Section 1 -------------------
+    # Ensure selected options exist
+    if lookups.id("focus", focus) is None:
+        feedback["focus_fb"] = "invalid option"
+    elif lookups.id("setting", setting) is None:
+        feedback["setting_fb"] = "invalid option"
+
+    # ---------------- Section 2 -------------------
+    # Validate date format/range
+    today = date.today()
+    try:
+        start_date = date.fromisoformat(start_date)
+        end_date = date.fromisoformat(end_date)
+        if start_date < today or end_date <= today or end_date <= start_date:
+            feedback["date_fb"] = "invalid range"
+    except (ValueError, TypeError):
+        feedback["date_fb"] = "invalid date"
+
+    # ---------------- Section 3 -------------------
+    topics = [t.strip() for t in topics if isinstance(t, str) and t.strip()]  # Add only non-empty to list
+
+    # Ensure at least 1 but no more than 5 topics
+    if not topics:
+        feedback["table_fb"] = "min 1 activity"
+    elif len(topics) > 5:
+        feedback["table_fb"] = "max 5 activities"
+
+    topic_ideas = {}
+    for i, topic in enumerate(topics):
+        idea_list = idea_lists[i] if i < len(idea_lists) else []
+        filtered = [idea.strip() for idea in idea_list if isinstance(idea, str) and idea.strip()][:2]  # Accept only 2 per topic, Discard empty if any
+        # Ensure 1 idea per topic before adding
+        if not filtered:
+            feedback["table_fb"] = "min 1 option per activity"
+        topic_ideas[i] = filtered
+
+    # ---------------- Section 4 -------------------
+    # Ensure it is positive integer
+    pass_limit = expected_total = None
+    try:
+        pass_limit = int(min_participants)
+        if pass_limit < 1:
+            raise ValueError
+    except (ValueError, TypeError):
+        feedback["limit_fb"] = "invalid number"
+        pass_limit = None
+
+    # Ensure it is positive integer >= pass limit
+    try:
+        expected_total = int(max_participants)
+        if expected_total < (pass_limit or 1):
+            raise ValueError
+    except (ValueError, TypeError):
+        feedback["max_fb"] = "invalid number"
+
+    spec = {
+        "focus": focus,
+        "setting": setting,
+        "start_date": start_date,
+        "end_date": end_date,
+        "topics": topics,
+        "topic_ideas": topic_ideas,
+        "pass_limit": pass_limit,
+        "expected_total": expected_total
+    }
+    return feedback, spec
+
+
+def validate_event_specs(specs):
+    """Validate JSON event specs (bulk API/CLI), return (cleaned specs, errors by index)"""
+
+    cleaned, errors = [], []
+    for index, raw in enumerate(specs):
+        if not isinstance(raw, dict):
+            errors.append({"index": index, "errors": {"spec": "expected an object"}})
+            continue
+        # Topics given as [{"topic": ..., "ideas": [...]}, ...]
+        raw_topics = raw.get("topics") if isinstance(raw.get("topics"), list) else []
+        topics = [t.get("topic") if isinstance(t, dict) else None for t in raw_topics]
+        idea_lists = [t.get("ideas") or [] if isinstance(t, dict) else [] for t in raw_topics]
+
+        # Ideas of blank topics are dropped like the form does (indexes follow kept topics)
+        kept = [i for i, t in enumerate(topics) if isinstance(t, str) and t.strip()]
+        feedback, spec = validate_event(
+            raw.get("focus"), raw.get("setting"), raw.get("start_date"), raw.get("end_date"),
+            topics, [idea_lists[i] for i in kept],
+            raw.get("min_participants"), raw.get("max_participants"))
+
+        problems = {key[:-3]: text for key, text in feedback.items() if text}
+        if problems:
+            errors.append({"index": index, "errors": problems})
+        else:
+            cleaned.append(spec)
+    return cleaned, errors
 
-    # Adapted from: GeeksforGeeks
-    # URL: https://www.geeksforgeeks.org/python/python-element-with-largest-frequency-in-list/
-    # URL: https://www.geeksforgeeks.org/python/python-counter-objects-elements/
 
-    # Returns a dict containing {date : count, ...}
-    date_counts = Counter(dates)
-    # Reject date occurrences < attendee requirement (excluding creator)
-    eligible = {date: count for date, count in date_counts.items() if count >= (pass_limit - 1)}
-    # Return a date, or None if none qualify
-    return max(eligible, key=eligible.get) if eligible else None
+def _next_id(cur, table):
+    """Return next AUTOINCREMENT id of table (call inside a write transaction)"""
 
+    cur.execute(f"""SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = ?), 0),
+                               COALESCE((SELECT MAX(id) FROM {table}), 0)) + 1""", (table,))
+    return cur.fetchone()[0]
 
-def choose_activities(event_id):
-    """Pick a random idea per activity/topic. Confirm choices in db"""
+
+def create_events(creator_id, specs):
+    """Insert validated events with topics, ideas, invite and creator response, return (event_id, token, expires_at) list"""
 
     db = get_db()
     cur = db.cursor()
 
-    # Get topics from event
-    cur.execute("SELECT id, topic FROM activity_topics WHERE event_id = ?", (event_id,))
-    topics = cur.fetchall()
+    # Hold the write lock so pre-assigned ids can't collide with another writer
+    cur.execute("BEGIN IMMEDIATE")
+    event_id = _next_id(cur, "events")
+    topic_id = _next_id(cur, "activity_topics")
+    invite_id = _next_id(cur, "invites")
+
+    # Generate invite tokens (expire after a week)
+    expires_at = date.today() + timedelta(days=7) # Testing 1 - Change to 7 for production
+
+    events, topics, ideas, invites, responses, created = [], [], [], [], [], []
+    for spec in specs:
+        events.append((event_id, creator_id, lookups.id("focus", spec["focus"]), lookups.id("setting", spec["setting"]),
+                       spec["start_date"], spec["end_date"], spec["pass_limit"], spec["expected_total"]))
+
+        for i, topic in enumerate(spec["topics"]):
+            topics.append((topic_id, event_id, topic))
+            ideas.extend((topic_id, creator_id, idea) for idea in spec["topic_ideas"][i])
+            topic_id += 1
+
+        invite_token = uuid.uuid4().hex
+        invites.append((invite_id, event_id, creator_id, invite_token, expires_at))
+        # Creator auto-confirm
+        responses.append((invite_id, creator_id, 1))
+        created.append((event_id, invite_token, expires_at))
+        event_id += 1
+        invite_id += 1
+
+    cur.executemany("""INSERT INTO events (id, creator_id, focus_id, setting_id, start_date, end_date, pass_limit, expected_total)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?)""", events)
+    cur.executemany("INSERT INTO activity_topics (id, event_id, topic) VALUES (?, ?, ?)", topics)
+    cur.executemany("INSERT INTO activity_ideas (topic_id, user_id, idea) VALUES (?, ?, ?)", ideas)
+    cur.executemany("""INSERT INTO invites (id, event_id, creator_id, token, expires_at)
+                       VALUES (?, ?, ?, ?, ?)""", invites)
+    cur.executemany("INSERT INTO responses (invite_id, user_id, res) VALUES (?, ?, ?)", responses)
+    db.commit() # Commit all changes
+
+    for event_id, _, expires_at in created:
+        expiry_scheduler.schedule(event_id, expires_at)
+    return created
+
+
+def load_dashboard(user_id, status_id=None, before=None, limit=24):
+    """Return one page of unexpired events linked to user (newest first) and the next page's cursor
+
+    before: (created_at, event_id) of the last event on the previous page
+    """
 
-    for topic in topics:
+    db = get_read_db()
+    cur = db.cursor()
+    params = {"user_id": user_id, "today": date.today().isoformat(), "limit": limit + 1}
+
+    # Keyset page over the user_events timeline (migrations/0010): an index range on
+    # (user_id[, status_id], created_at, event_id), so page N costs the same as page 1
+    filters = ""
+    if status_id is not None:
+        filters += " AND ue.status_id = :status_id"
+        params["status_id"] = status_id
+    if before is not None:
+        filters += " AND (ue.created_at, ue.event_id) < (:created_at, :event_id)"
+        params["created_at"], params["event_id"] = before
+
+    # Counts read from stored counters, expired events left to the expiry scheduler
+    cur.execute(f"""
+                   SELECT e.id, e.creator_id, e.status_id, e.expected_total, e.chosen_date,
+                          ue.created_at, i.token, i.expires_at,
+                          e.confirm_count + e.decline_count AS response_count,
+                          (SELECT r.res FROM responses r
+                           WHERE r.invite_id = i.id AND r.user_id = :user_id) AS user_res
+                   FROM user_events ue
+                   JOIN events e ON e.id = ue.event_id
+                   JOIN invites i ON i.event_id = e.id
+                   WHERE ue.user_id = :user_id{filters}
+                     AND i.expires_at > :today
+                   ORDER BY ue.created_at DESC, ue.event_id DESC
+                   LIMIT :limit""", params)
+    rows = cur.fetchall()
+
+    # Extra row fetched only to know whether another page exists
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, page_cursor(rows[-1]["created_at"], rows[-1]["id"])
+    return rows, None
+
+
+def page_cursor(created_at, event_id):
+    """Encode dashboard keyset position as an opaque url-safe cursor"""
+
+    return base64.urlsafe_b64encode(f"{created_at}|{event_id}".encode()).decode().rstrip("=")
+
+
+def parse_cursor(cursor):
+    """Decode page_cursor() output to (created_at, event_id), None if missing/invalid"""
+
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, event_id = raw.rsplit("|", 1)
+        return created_at, int(event_id)
+    except ValueError:
+        return None
+
+
+def load_event_status(token):
+    """Return id, version, status, counters and dates of the event behind token (None if gone)"""
+
+    db = get_read_db()
+    cur = db.cursor()
+    cur.execute("""
+                   SELECT e.id, e.version, e.status_id, e.confirm_count, e.decline_count, e.pending_count,
+                          e.expected_total, e.pass_limit, e.chosen_date, i.expires_at
+                   FROM invites i
+                   JOIN events e ON e.id = i.event_id
+                   WHERE i.token = ?""", (token,))
+    return cur.fetchone()
 
-        topic_id = topic["id"]
-        topic_str = topic["topic"]
 
-        # Get all ideas from that topic
-        cur.execute("SELECT idea FROM activity_ideas WHERE topic_id = ?", (topic_id,))
-        ideas = [i["idea"] for i in cur.fetchall()]
+def resolve_invite(token, fresh=False):
+    """Return {invite_id, event_id, creator_id, event, topics} behind token (None if invalid)
 
-        # Adapted from: W3 school tutorials
-        # URL: https://www.w3schools.com/python/ref_random_choice.asp
-        # Pick a random suggestion for each topic if any
-        activity_label = random.choice(ideas) if ideas else "No suggestions."
+    event: status, dates, focus/setting ids and creator username (None if event is gone)
+    fresh: skip the cache (submits must not act on a status another worker just changed)
+    Counters and versions move with every response, so they are never part of the entry.
+    """
 
-        # Insert directly into confirmed_activities
-        cur.execute("INSERT INTO confirmed_activities (event_id, topic_label, activity_label) VALUES (?, ?, ?)",
-                     (event_id, topic_str, activity_label))
-    db.commit()
+    entry = None if fresh else invite_cache.get(token)
+    if entry is not None:
+        return entry
+
+    generation = invite_cache.generation()
+    db = get_read_db()
+    cur = db.cursor()
+    cur.execute("SELECT id, event_id, creator_id FROM invites WHERE token = ?", (token,))
+    invite = cur.fetchone()
+    if not invite:
+        return None
+
+    # Event and creator (username is None once the creator deleted their account)
+    cur.execute("""
+                   SELECT e.id, e.creator_id, e.status_id, e.focus_id, e.setting_id, e.start_date, e.end_date,
+                          u.username
+                   FROM events e
+                   LEFT JOIN users u ON e.creator_id = u.id
+                   WHERE e.id = ?""", (invite["event_id"],))
+    event = cur.fetchone()
+    entry = {
+        "invite_id": invite["id"],
+        "event_id": invite["event_id"],
+        "creator_id": invite["creator_id"],
+        "event": dict(event) if event else None,
+        "topics": [],
+    }
+    if event is None:
+        return entry
+
+    cur.execute("SELECT id, topic FROM activity_topics WHERE event_id = ? ORDER BY id", (invite["event_id"],))
+    entry["topics"] = [dict(topic) for topic in cur.fetchall()]
+    invite_cache.set(token, entry, generation)
+    return entry
+
+
+def announce(event_ids):
+    """Wake status long-polls and push current status/counts to every linked user's SSE streams"""
+
+    event_ids = list(event_ids)
+    for event_id in event_ids:
+        event_changes.notify(event_id)
+
+    # Nobody to push to (no local streams, no other workers behind a relay)
+    if not push_broker.listening():
+        return
+
+    db = get_read_db()
+    cur = db.cursor()
+    # Chunked to stay under sqlite's bound parameter limit (deleted events have no linked users left)
+    for i in range(0, len(event_ids), 500):
+        chunk = event_ids[i:i + 500]
+        cur.execute(f"""
+                       SELECT ue.user_id, e.id, e.version, e.status_id, e.confirm_count, e.decline_count,
+                              e.pending_count, e.chosen_date
+                       FROM user_events ue
+                       JOIN events e ON e.id = ue.event_id
+                       WHERE ue.event_id IN ({",".join("?" * len(chunk))})""", chunk)
+        events = {}
+        for row in cur.fetchall():
+            users, _ = events.setdefault(row["id"], ([], row))
+            users.append(row["user_id"])
+        for users, row in events.values():
+            push_broker.publish(users, "event", {
+                "event_id": row["id"],
+                "version": row["version"],
+                "status": lookups.label("status", row["status_id"]).lower(),
+                "confirmed": row["confirm_count"],
+                "declined": row["decline_count"],
+                "pending": row["pending_count"],
+                "chosen_date": row["chosen_date"],
+            })
+
+
+def schedule_plan(event_id, pass_limit):
+    """Return an appropriate date picked"""
+
+    db = get_db()
+    cur = db.cursor()
+    # Most picked date meeting attendee requirement (excluding creator), earliest on ties
+    # Single index seek on idx_event_date_tallies_rank, whatever the number of picks
+    cur.execute("""SELECT date FROM event_date_tallies
+                   WHERE event_id = ? AND picks >= ?
+                   ORDER BY picks DESC, date
+                   LIMIT 1""", (event_id, max(pass_limit - 1, 1)))
+    row = cur.fetchone()
+    # Return a date, or None if none qualify
+    return row["date"] if row else None
+
+
+def choose_activities(event_id):
+    """Pick a random idea per activity/topic. Confirm choices in db (caller commits)"""
+
+    db = get_db()
+    cur = db.cursor()
+
+    # Adapted from: SQLite documentation - random()
+    # URL: https://www.sqlite.org/lang_corefunc.html#random
+    # One statement: random suggestion per topic if any, skipped if event already has picks
+    # (unique topic_id index guards against a concurrent double insert)
+    cur.execute("""
+                   INSERT OR IGNORE INTO confirmed_activities (event_id, topic_id, topic_label, activity_label)
+                   SELECT t.event_id, t.id, t.topic,
+                          COALESCE((SELECT ai.idea FROM activity_ideas ai
+                                    WHERE ai.topic_id = t.id
+                                    ORDER BY random() LIMIT 1), 'No suggestions.')
+                   FROM activity_topics t
+                   WHERE t.event_id = ?
+                     AND NOT EXISTS (SELECT 1 FROM confirmed_activities ca WHERE ca.event_id = t.event_id)
+                   ORDER BY t.id""", (event_id,))
 
 
 def evaluate_event(event_id):
-    """Evaluate event responses against pass_limit, return status dict."""
+    """Read event's stored RSVP counters and pass_limit, return status dict."""
 
     db = get_db()
     cur = db.cursor()
-    # Query adjusted by ChatGPT (OpenAI)
-    cur.execute("""SELECT
-                        e.pass_limit, e.chosen_date, e.expected_total,
-                        SUM(CASE WHEN r.res = 1 THEN 1 ELSE 0 END) AS confirm,
-                        SUM(CASE WHEN r.res = 0 THEN 1 ELSE 0 END) AS decline
-                   FROM events e
-                   JOIN invites i ON e.id = i.event_id
-                   LEFT JOIN responses r ON i.id = r.invite_id
-                   WHERE e.id = ?""", (event_id,))
+    # Counters are kept current by triggers on responses (see migrations/0002)
+    cur.execute("""SELECT pass_limit, chosen_date, expected_total,
+                          confirm_count, decline_count, pending_count
+                   FROM events WHERE id = ?""", (event_id,))
     stats = cur.fetchone()
 
     return {
-        "confirm": stats["confirm"] or 0,
-        "decline": stats["decline"] or 0,
+        "confirm": stats["confirm_count"],
+        "decline": stats["decline_count"],
+        "pending": stats["pending_count"],
         "expected_total": stats["expected_total"],
         "pass_limit": stats["pass_limit"],
         "chosen_date": stats["chosen_date"]
     }
 
 
+def reconcile_counters(event_id=None):
+    """Rebuild stored RSVP counters from responses (one event or all), return rows updated"""
+
+    db = get_db()
+    cur = db.cursor()
+    # Recount from scratch in case counters drifted (e.g. rows edited by hand)
+    cur.execute("""UPDATE events
+                   SET confirm_count = (SELECT COUNT(*) FROM invites i JOIN responses r ON r.invite_id = i.id
+                                        WHERE i.event_id = events.id AND r.res = 1),
+                       decline_count = (SELECT COUNT(*) FROM invites i JOIN responses r ON r.invite_id = i.id
+                                        WHERE i.event_id = events.id AND r.res = 0),
+                       pending_count = expected_total - (SELECT COUNT(*) FROM invites i JOIN responses r ON r.invite_id = i.id
+                                                         WHERE i.event_id = events.id AND r.res IS NOT NULL)
+                   WHERE ? IS NULL OR id = ?""", (event_id, event_id))
+    updated = cur.rowcount
+    db.commit()
+    return updated
+
+
 def common_check(event_id, confirm, pass_limit, action="cancel"):
     """Common check before confirming and cancelling/deleting events"""
 
     db = get_db()
     cur = db.cursor()
 
+    chosen_date = None
+
     # Requirement met/Mostly confirm(s)
     if confirm >= pass_limit:
         # Find convenient date
-        cur.execute("SELECT date FROM event_dates WHERE event_id = ?", (event_id,))
-        dates = [row["date"] for row in cur.fetchall()]
-        chosen_date = schedule_plan(dates, pass_limit)
+        chosen_date = schedule_plan(event_id, pass_limit)
 
         # Convenient date found
         if chosen_date is not None:
             # Update event and extend expiry
             cur.execute("UPDATE events SET status_id = 1, chosen_date = ? WHERE id = ?", (chosen_date, event_id))
             cur.execute("UPDATE invites SET expires_at = ? WHERE event_id = ?", (chosen_date, event_id))
+            # Decide activities now so /scheduled/<token> only reads
+            choose_activities(event_id)
 
         # Date not found, Cancel/Delete event
         else:
@@ -171,6 +547,11 @@ def common_check(event_id, confirm, pass_limit, action="cancel"):
         else:
             cur.execute("UPDATE events SET status_id = 2 WHERE id = ?", (event_id,))
     db.commit() # Commit all changes to db
+    invite_cache.discard_events([event_id])
+
+    # Only once the new expiry is committed (same order as create_events)
+    if chosen_date is not None:
+        expiry_scheduler.schedule(event_id, chosen_date)
 
 
 def removal_check(event_id):
@@ -191,6 +572,130 @@ def removal_check(event_id):
         # Confirmed event expired, Delete event
         cur.execute("DELETE FROM events WHERE id = ?", (event_id,))
         db.commit() # Commit all changes to db
+        plan_cache.discard(event_id)
+        invite_cache.discard_events([event_id])
+
+    announce([event_id])
+
+
+def removal_sweep(event_ids):
+    """Set-based removal_check for a batch of expired events, return (confirmed, deleted)"""
+
+    db = get_db()
+    cur = db.cursor()
+    today = date.today().isoformat()
+
+    # One write transaction per batch. The ids were picked before it started, so only
+    # events whose invite is still expired make it in (a removal_check or another
+    # worker may have confirmed/extended or deleted some of them since)
+    cur.execute("BEGIN IMMEDIATE")
+    cur.execute("CREATE TEMP TABLE IF NOT EXISTS sweep (event_id INTEGER PRIMARY KEY, chosen_date DATE)")
+    cur.execute("CREATE TEMP TABLE IF NOT EXISTS sweep_winners (event_id INTEGER PRIMARY KEY, date DATE)")
+    cur.execute("DELETE FROM sweep")
+    cur.execute("DELETE FROM sweep_winners")
+    cur.executemany("""INSERT OR IGNORE INTO sweep (event_id)
+                       SELECT i.event_id FROM invites i
+                       JOIN events e ON e.id = i.event_id
+                       WHERE i.event_id = :event_id AND i.expires_at <= :today""",
+                    [{"event_id": i, "today": today} for i in event_ids])
+    event_ids = [row[0] for row in cur.execute("SELECT event_id FROM sweep")]
+
+    # Winning date per unconfirmed event that met pass_limit:
+    # most picked date with >= pass_limit - 1 picks (excluding creator), earliest on ties.
+    # Ranked once into sweep_winners, then copied over by primary key. CROSS JOIN keeps
+    # sweep as the outer loop (a plain JOIN lets the planner scan all of events)
+    cur.execute("""
+                   INSERT INTO sweep_winners (event_id, date)
+                   SELECT event_id, date FROM (
+                       SELECT t.event_id, t.date,
+                              ROW_NUMBER() OVER (PARTITION BY t.event_id ORDER BY t.picks DESC, t.date) AS rn
+                       FROM sweep s
+                       CROSS JOIN events e ON e.id = s.event_id
+                       CROSS JOIN event_date_tallies t ON t.event_id = s.event_id
+                       WHERE e.chosen_date IS NULL
+                         AND e.confirm_count >= e.pass_limit
+                         AND t.picks >= MAX(e.pass_limit - 1, 1)
+                   )
+                   WHERE rn = 1""")
+    cur.execute("""UPDATE sweep
+                   SET chosen_date = (SELECT w.date FROM sweep_winners w WHERE w.event_id = sweep.event_id)
+                   WHERE event_id IN (SELECT event_id FROM sweep_winners)""")
+
+    # Confirm events with a winning date and extend expiry to it
+    cur.execute("""UPDATE events
+                   SET status_id = 1,
+                       chosen_date = (SELECT s.chosen_date FROM sweep s WHERE s.event_id = events.id)
+                   WHERE id IN (SELECT event_id FROM sweep WHERE chosen_date IS NOT NULL)""")
+    confirmed = cur.rowcount
+    cur.execute("""UPDATE invites
+                   SET expires_at = (SELECT s.chosen_date FROM sweep s WHERE s.event_id = invites.event_id)
+                   WHERE event_id IN (SELECT event_id FROM sweep WHERE chosen_date IS NOT NULL)""")
+
+    # Decide activities for the newly confirmed events (random idea per topic, sweep drives)
+    cur.execute("""
+                   INSERT OR IGNORE INTO confirmed_activities (event_id, topic_id, topic_label, activity_label)
+                   SELECT t.event_id, t.id, t.topic,
+                          COALESCE((SELECT ai.idea FROM activity_ideas ai
+                                    WHERE ai.topic_id = t.id
+                                    ORDER BY random() LIMIT 1), 'No suggestions.')
+                   FROM sweep s
+                   CROSS JOIN activity_topics t ON t.event_id = s.event_id
+                   WHERE s.chosen_date IS NOT NULL
+                     AND NOT EXISTS (SELECT 1 FROM confirmed_activities ca WHERE ca.event_id = t.event_id)
+                   ORDER BY t.id""")
+
+    # Delete the rest (already confirmed and expired, or requirement not met)
+    cur.execute("DELETE FROM events WHERE id IN (SELECT event_id FROM sweep WHERE chosen_date IS NULL)")
+    deleted = cur.rowcount
+    db.commit()
+
+    # Drop rendered plans of deleted events (newly confirmed ones have none yet)
+    for event_id in event_ids:
+        plan_cache.discard(event_id)
+    invite_cache.discard_events(event_ids)
+    announce(event_ids)
+
+    return confirmed, deleted
+
+
+def expire_event(event_id):
+    """Run removal_check if event still exists and has expired (Background task)"""
+
+    db = get_db()
+    cur = db.cursor()
+
+    # Take the write lock first so only one worker cleans up this event
+    cur.execute("BEGIN IMMEDIATE")
+    cur.execute("""SELECT i.expires_at
+                   FROM events e
+                   JOIN invites i ON e.id = i.event_id
+                   WHERE e.id = ?""", (event_id,))
+    row = cur.fetchone()
+
+    # Already removed (e.g. by another worker or system_check.py)
+    if row is None:
+        db.rollback()
+        return
+
+    # Expiry was moved (e.g. confirmed by another worker), follow the new date
+    expires_at = date.fromisoformat(row["expires_at"])
+    if expires_at > date.today():
+        db.rollback()
+        expiry_scheduler.schedule(event_id, expires_at)
+        return
+
+    removal_check(event_id)
+
+
+def load_expiries():
+    """Return (event_id, expires_at) of every event for the expiry scheduler"""
+
+    db = get_db()
+    cur = db.cursor()
+    cur.execute("""SELECT e.id, i.expires_at
+                   FROM events e
+                   JOIN invites i ON e.id = i.event_id""")
+    return [(row["id"], row["expires_at"]) for row in cur.fetchall()]
 
 
 def responses_check(event_id):
@@ -201,12 +706,9 @@ def responses_check(event_id):
     stats = evaluate_event(event_id)
 
     confirm = stats["confirm"]
-    decline = stats["decline"]
-    responded = confirm + decline
-
     pass_limit = stats["pass_limit"]
-    expected_total = stats["expected_total"]
-    pending = expected_total - responded
+    # Invitees yet to answer (expected_total - confirmed - declined, see migrations/0013)
+    pending = stats["pending"]
 
     # Everyone has responded
     if pending <= 0:
@@ -217,36 +719,69 @@ def responses_check(event_id):
         if pending + confirm < pass_limit:
             cur.execute("UPDATE events SET status_id = 2 WHERE id = ?", (event_id,))
             db.commit() # Commit all changes to db
+            invite_cache.discard_events([event_id])
+
+    # Response recorded, maybe confirmed/cancelled: tell pollers and live streams
+    announce([event_id])
 
 
 def unique_username(base_name):
-    """Add random digits after username until it's unique in db"""
+    """Return base_name, or base_name_NNNN with a random free suffix, using one query per suffix width"""
 
     db = get_db()
     cur = db.cursor()
-    username = base_name
 
-    # Keep randomizing until username is unique
-    while True:
-        cur.execute("SELECT 1 FROM users WHERE username = ?", (username,))
-        if not cur.fetchone():
-            return username
-        # 4 random digits
-        username = f"{base_name}_{''.join(random.choices(string.digits, k=4))}"
+    # 4 digits as before, wider only once all 10,000 suffixes of a width are taken
+    for digits in (4, 5, 6, 7, 8):
+        low, high = f"{base_name}_{'0' * digits}", f"{base_name}_{'9' * digits}"
+        # Index range on users.username: every name in [base_0000, base_9999] plus base itself
+        cur.execute("""SELECT username FROM users
+                       WHERE username = ? OR (username >= ? AND username <= ?)""", (base_name, low, high))
+        names = {row["username"] for row in cur.fetchall()}
+        if digits == 4 and base_name not in names:
+            return base_name
+
+        prefix = len(base_name) + 1
+        taken = {int(name[prefix:]) for name in names
+                 if len(name) == prefix + digits and name[prefix:].isdigit()}
+        if len(taken) < 10 ** digits:
+            # Random probes while mostly free, explicit list once crowded
+            if len(taken) < 10 ** digits // 2:
+                while (suffix := random.randrange(10 ** digits)) in taken:
+                    pass
+            else:
+                suffix = random.choice([n for n in range(10 ** digits) if n not in taken])
+            return f"{base_name}_{suffix:0{digits}d}"
+
+    raise RuntimeError(f"no free username suffix for {base_name!r}")
 
 
 def remove_photo(web_path, default_web_path):
-    """Delete photo from file system if it's not default photo"""
+    """Delete photo files once no user references them (never the default photo)"""
 
     if web_path and web_path != default_web_path:
-        # Aapted from: Python documentation - os.path
-        # URL: https://docs.python.org/3/library/os.path.html
-        # Adaptation guidance by ChatGPT (OpenAI)
-
-        # Convert from web to file path
-        file_path = os.path.join(current_app.root_path, web_path.lstrip("/"))
-        file_path = os.path.normpath(file_path)
-
-        # Validate path and ensure selected is a file before delete
-        if os.path.exists(file_path) and os.path.isfile(file_path):
-            os.remove(file_path)
+        db = get_db()
+        cur = db.cursor()
+
+        # Identical uploads share files (see photos.py): keep them while still referenced.
+        # Write lock serializes this check with uploads saving the same photo
+        cur.execute("BEGIN IMMEDIATE")
+        try:
+            cur.execute("SELECT 1 FROM users WHERE photo = ? LIMIT 1", (web_path,))
+            if cur.fetchone():
+                return
+
+            for path in photo_files(web_path):
+                # Aapted from: Python documentation - os.path
+                # URL: https://docs.python.org/3/library/os.path.html
+                # Adaptation guidance by ChatGPT (OpenAI)
+
+                # Convert from web to file path
+                file_path = os.path.join(current_app.root_path, path.lstrip("/"))
+                file_path = os.path.normpath(file_path)
+
+                # Validate path and ensure selected is a file before delete
+                if os.path.exists(file_path) and os.path.isfile(file_path):
+                    os.remove(file_path)
+        finally:
+            db.commit()
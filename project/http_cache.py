@@ -0,0 +1,102 @@
+import hashlib
+import os
+
+from flask import request, session
+from werkzeug.security import safe_join
+from photos import HASHED_PHOTO
+
+# Cache-Control values
+IMMUTABLE = "public, max-age=31536000, immutable"   # Fingerprinted / content-addressed files
+REVALIDATE = "no-cache"                              # Cache, but check ETag/Last-Modified first
+PRIVATE = "private, no-store"                        # Logged-in pages (user data)
+
+CHUNK_SIZE = 64 * 1024
+
+
+class StaticFingerprints:
+    """Content hash per static file, computed once by walking the static folder
+
+    Nothing is read from disk per request. Uploaded photos are skipped (they are
+    content-addressed already); call refresh() after changing files in place.
+    """
+
+    def __init__(self, static_folder, skip=("uploads",)):
+        self.static_folder = static_folder
+        self.skip = set(skip)
+        self._versions = {}          # filename (posix, relative) -> hash
+
+    def refresh(self):
+        """Hash every static file (chunked reads, regular files only)"""
+
+        versions = {}
+        for root, dirs, files in os.walk(self.static_folder):
+            if root == self.static_folder:
+                dirs[:] = [d for d in dirs if d not in self.skip]
+            for name in files:
+                path = os.path.join(root, name)
+                if not os.path.isfile(path):
+                    continue
+                digest = hashlib.sha256()
+                with open(path, "rb") as f:
+                    for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                        digest.update(chunk)
+                filename = os.path.relpath(path, self.static_folder).replace(os.sep, "/")
+                versions[filename] = digest.hexdigest()[:12]
+        self._versions = versions
+
+    def version(self, filename):
+        """Return short content hash of a static file (None if unknown or outside static/)"""
+
+        if safe_join(self.static_folder, filename) is None:
+            return None
+        return self._versions.get(filename)
+
+    def url(self, filename):
+        """Template global: /static/<filename>?v=<hash>"""
+
+        version = self.version(filename)
+        return f"/static/{filename}?v={version}" if version else f"/static/{filename}"
+
+
+def init_http_cache(app):
+    """Install static_url() template global and the per-route Cache-Control policy"""
+
+    fingerprints = StaticFingerprints(app.static_folder)
+    fingerprints.refresh()
+    app.add_template_global(fingerprints.url, "static_url")
+
+    @app.after_request
+    def cache_policy(response):
+        """Immutable static assets, revalidated public pages, no-store for logged-in pages"""
+
+        if request.endpoint == "static":
+            # Flask already answers If-None-Match/If-Modified-Since with 304 for static files
+            # Only files actually served (never a 404 or a path outside static/) go immutable;
+            # the version is looked up in memory, the requested path never touches the disk
+            filename = (request.view_args or {}).get("filename", "")
+            version = request.args.get("v")
+            served = response.status_code in (200, 304)
+            if served and ((version and version == fingerprints.version(filename)) or HASHED_PHOTO.match(request.path)):
+                response.headers["Cache-Control"] = IMMUTABLE
+            else:
+                response.headers["Cache-Control"] = REVALIDATE
+            return response
+
+        # Views may set their own policy (e.g. the JSON status API revalidates with ETags)
+        if "Cache-Control" in response.headers:
+            return response
+
+        if session.get("user_id"):
+            response.headers["Cache-Control"] = PRIVATE
+            response.headers["Expires"] = 0
+            response.headers["Pragma"] = "no-cache"
+            return response
+
+        # Public pages (login, signup, errors): ETag so repeat views can be a 304
+        response.headers["Cache-Control"] = REVALIDATE
+        if request.method in ("GET", "HEAD") and response.status_code == 200 and not response.direct_passthrough:
+            response.add_etag()
+            response.make_conditional(request)
+        return response
+
+    return fingerprints
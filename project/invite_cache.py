@@ -0,0 +1,124 @@
+import os
+import threading
+import time
+
+from collections import OrderedDict
+
+
+class InviteCache:
+    """LRU of resolved invite tokens (invite, event, creator, topics) with a TTL
+
+    Entries are dropped here when their event changes status or is deleted and when
+    their creator is renamed/deleted. Changes made by other worker processes are only
+    picked up when the entry expires, so writes re-resolve with fresh=True.
+    """
+
+    def __init__(self, max_entries=10000, ttl=30.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()   # token -> (expires, entry)
+        self._by_event = {}          # event_id -> set of tokens
+        self._by_creator = {}        # creator_id -> set of tokens
+        self._generation = 0         # Bumped by every invalidation
+        self._lock = threading.Lock()
+
+        # Counters exposed via stats()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, token):
+        """Return cached entry for token (None on miss or expired)"""
+
+        with self._lock:
+            item = self._data.get(token)
+            if item is None or item[0] <= time.monotonic():
+                if item is not None:
+                    self._remove(token)
+                self.misses += 1
+                return None
+            self._data.move_to_end(token)
+            self.hits += 1
+            return item[1]
+
+    def generation(self):
+        """Read before loading an entry and pass to set()"""
+
+        return self._generation
+
+    def set(self, token, entry, generation):
+        """Store entry (needs "event_id" and "creator_id") unless invalidated since generation"""
+
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            # Loaded before a status change/rename landed: may already be stale
+            if generation != self._generation:
+                return
+            if token in self._data:
+                self._remove(token)
+            self._data[token] = (time.monotonic() + self.ttl, entry)
+            self._by_event.setdefault(entry["event_id"], set()).add(token)
+            self._by_creator.setdefault(entry["creator_id"], set()).add(token)
+            while len(self._data) > self.max_entries:
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+    def discard_events(self, event_ids):
+        """Drop entries of events whose status changed or that were deleted"""
+
+        with self._lock:
+            self._generation += 1
+            for event_id in event_ids:
+                for token in list(self._by_event.get(event_id, ())):
+                    self._remove(token)
+                    self.invalidations += 1
+
+    def discard_creator(self, user_id):
+        """Drop entries of events created by user_id (renamed or deleted)"""
+
+        with self._lock:
+            self._generation += 1
+            for token in list(self._by_creator.get(user_id, ())):
+                self._remove(token)
+                self.invalidations += 1
+
+    def clear(self):
+        """Drop every entry and reset counters (e.g. benchmark switching databases)"""
+
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+            self._by_event.clear()
+            self._by_creator.clear()
+            self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def _remove(self, token):
+        _, entry = self._data.pop(token)
+        for index, key in ((self._by_event, entry["event_id"]), (self._by_creator, entry["creator_id"])):
+            tokens = index[key]
+            tokens.discard(token)
+            if not tokens:
+                del index[key]
+
+    def stats(self):
+        """Return counters and hit rate as a dict"""
+
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Resolved /rsvp/<token> links (one per worker process)
+invite_cache = InviteCache(
+    max_entries=int(os.environ.get("INVITE_CACHE_ENTRIES", 10000)),
+    ttl=float(os.environ.get("INVITE_CACHE_TTL", 30)),
+)
@@ -0,0 +1,118 @@
+import argparse
+import os
+import sqlite3
+import threading
+import time
+
+# kind -> (table, label column)
+TABLES = {
+    "focus": ("event_focuses", "focus_label"),
+    "setting": ("event_settings", "setting_label"),
+    "status": ("event_statuses", "status_label"),
+}
+
+
+class LookupCache:
+    """Process-wide label <-> id maps of the lookup tables, reloaded on version bump"""
+
+    def __init__(self, check_interval=30.0):
+        self.check_interval = check_interval
+        self.connect = None          # Callable returning a db connection (set by helpers)
+        self.version = None
+        self._ids = {}               # kind -> {label: id}
+        self._labels = {}            # kind -> {id: label}
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    def load(self, db=None):
+        """Read every lookup table and the current version"""
+
+        db = db or self.connect()
+        version = db.execute("SELECT version FROM lookup_version WHERE id = 1").fetchone()[0]
+        ids, labels = {}, {}
+        for kind, (table, column) in TABLES.items():
+            rows = db.execute(f"SELECT id, {column} FROM {table} ORDER BY id").fetchall()
+            labels[kind] = {row[0]: row[1] for row in rows}
+            ids[kind] = {row[1]: row[0] for row in rows}
+
+        with self._lock:
+            self._ids, self._labels = ids, labels
+            self.version = version
+            self._checked = time.monotonic()
+            self.reloads += 1
+
+    def _fresh(self):
+        """Reload if never loaded, or if version changed (checked every check_interval)"""
+
+        if self.version is None:
+            self.load()
+        elif time.monotonic() - self._checked >= self.check_interval:
+            db = self.connect()
+            version = db.execute("SELECT version FROM lookup_version WHERE id = 1").fetchone()[0]
+            if version != self.version:
+                self.load(db)
+            else:
+                self._checked = time.monotonic()
+
+    def labels(self, kind):
+        """Return labels of kind in id order (e.g. form options)"""
+
+        self._fresh()
+        return list(self._labels[kind].values())
+
+    def id(self, kind, label):
+        """Return id of label (None if unknown)"""
+
+        self._fresh()
+        return self._ids[kind].get(label)
+
+    def label(self, kind, id):
+        """Return label of id (None if unknown)"""
+
+        self._fresh()
+        return self._labels[kind].get(id)
+
+    def invalidate(self):
+        """Force a version check on next use"""
+
+        self._checked = 0.0
+
+
+# Shared instance (one per worker process)
+lookups = LookupCache()
+
+
+if __name__ == "__main__":
+    # Admin command: edits go through the version triggers (migrations/0005), so every
+    # worker reloads within check_interval seconds
+    parser = argparse.ArgumentParser(description="List or edit event focus/setting/status options")
+    parser.add_argument("--db", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "planit.db"))
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="show every option")
+    add = sub.add_parser("add", help="add an option")
+    add.add_argument("kind", choices=["focus", "setting"])
+    add.add_argument("label")
+    rename = sub.add_parser("rename", help="rename an option")
+    rename.add_argument("kind", choices=sorted(TABLES))
+    rename.add_argument("old")
+    rename.add_argument("new")
+    args = parser.parse_args()
+
+    db = sqlite3.connect(args.db)
+    db.execute("PRAGMA busy_timeout = 5000")
+    if args.command == "add":
+        table, column = TABLES[args.kind]
+        db.execute(f"INSERT INTO {table} ({column}) VALUES (?)", (args.label,))
+    elif args.command == "rename":
+        table, column = TABLES[args.kind]
+        if db.execute(f"UPDATE {table} SET {column} = ? WHERE {column} = ?", (args.new, args.old)).rowcount == 0:
+            parser.error(f"no {args.kind} labelled {args.old!r}")
+    db.commit()
+
+    cache = LookupCache()
+    cache.load(db)
+    print(f"lookup version {cache.version}")
+    for kind in TABLES:
+        print(f"{kind}: " + ", ".join(f"{i}={label}" for i, label in cache._labels[kind].items()))
+    db.close()
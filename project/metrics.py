@@ -0,0 +1,249 @@
+import bisect
+import hmac
+import threading
+import time
+
+from flask import Response, abort, before_render_template, g, request, template_rendered
+
+# Callbacks run after every tracked statement: observer(conn, sql, parameters, seconds)
+# (e.g. query_plans.py in development)
+sql_observers = []
+
+# Request latency buckets (seconds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Fixed-bucket histogram (Prometheus style, cumulative on export)"""
+
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)   # Last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class TimedCursor:
+    """sqlite3 cursor proxy adding each statement's count and time to stats"""
+
+    __slots__ = ("raw", "stats")
+
+    def __init__(self, cursor, stats):
+        self.raw = cursor
+        self.stats = stats
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            self.raw.execute(sql, parameters)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stats[0] += 1
+            self.stats[1] += elapsed
+        for observer in sql_observers:
+            observer(self.raw.connection, sql, parameters, elapsed)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        # Materialize so observers can reuse the first row of parameters
+        if sql_observers:
+            seq_of_parameters = list(seq_of_parameters)
+        start = time.perf_counter()
+        try:
+            self.raw.executemany(sql, seq_of_parameters)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stats[0] += 1
+            self.stats[1] += elapsed
+        for observer in sql_observers:
+            observer(self.raw.connection, sql, seq_of_parameters[0] if seq_of_parameters else (), elapsed)
+        return self
+
+    def __iter__(self):
+        return iter(self.raw)
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+
+class TimedConnection:
+    """sqlite3 connection proxy: statements and commits counted/timed into stats
+
+    stats is a [count, seconds] list shared by every connection of the request.
+    """
+
+    __slots__ = ("raw", "stats")
+
+    def __init__(self, conn, stats):
+        self.raw = conn
+        self.stats = stats
+
+    def cursor(self):
+        return TimedCursor(self.raw.cursor(), self.stats)
+
+    def execute(self, sql, parameters=()):
+        return TimedCursor(self.raw.cursor(), self.stats).execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return TimedCursor(self.raw.cursor(), self.stats).executemany(sql, seq_of_parameters)
+
+    def commit(self):
+        start = time.perf_counter()
+        try:
+            self.raw.commit()
+        finally:
+            self.stats[1] += time.perf_counter() - start
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+
+class RequestMetrics:
+    """Per-endpoint request counters and latency histograms (one per worker process)"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._latency = {}     # endpoint -> Histogram
+        self._requests = {}    # (endpoint, method, status) -> count
+        self._sql = {}         # endpoint -> [statements, seconds]
+        self._render = {}      # endpoint -> [renders, seconds]
+        self._sources = []     # (prefix, callable returning a stats dict or list of dicts)
+
+    def observe(self, endpoint, method, status, seconds, sql, render):
+        """Record one finished request"""
+
+        with self._lock:
+            histogram = self._latency.get(endpoint)
+            if histogram is None:
+                histogram = self._latency[endpoint] = Histogram(self.buckets)
+            histogram.observe(seconds)
+            key = (endpoint, method, status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            totals = self._sql.setdefault(endpoint, [0, 0.0])
+            totals[0] += sql[0]
+            totals[1] += sql[1]
+            totals = self._render.setdefault(endpoint, [0, 0.0])
+            totals[0] += render[0]
+            totals[1] += render[1]
+
+    def add_source(self, prefix, stats):
+        """Export a component's stats() numbers as planit_<prefix>_<key> gauges"""
+
+        self._sources.append((prefix, stats))
+
+    def export(self):
+        """Return every metric in Prometheus text exposition format"""
+
+        lines = []
+        with self._lock:
+            lines += ["# HELP planit_requests_total Finished requests",
+                      "# TYPE planit_requests_total counter"]
+            for (endpoint, method, status), count in sorted(self._requests.items()):
+                lines.append(f'planit_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {count}')
+
+            lines += ["# HELP planit_request_duration_seconds Request latency",
+                      "# TYPE planit_request_duration_seconds histogram"]
+            for endpoint, histogram in sorted(self._latency.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), histogram.counts):
+                    cumulative += count
+                    lines.append(f'planit_request_duration_seconds_bucket{{endpoint="{endpoint}",le="{bound}"}} {cumulative}')
+                lines.append(f'planit_request_duration_seconds_sum{{endpoint="{endpoint}"}} {histogram.sum:.6f}')
+                lines.append(f'planit_request_duration_seconds_count{{endpoint="{endpoint}"}} {cumulative}')
+
+            for name, data, help_count, help_time in (
+                ("sql_statements", self._sql, "SQL statements executed", "Time in SQL statements and commits"),
+                ("template_renders", self._render, "Templates rendered", "Time rendering templates"),
+            ):
+                lines += [f"# HELP planit_{name}_total {help_count}", f"# TYPE planit_{name}_total counter"]
+                lines += [f'planit_{name}_total{{endpoint="{e}"}} {t[0]}' for e, t in sorted(data.items())]
+                lines += [f"# HELP planit_{name}_seconds_total {help_time}", f"# TYPE planit_{name}_seconds_total counter"]
+                lines += [f'planit_{name}_seconds_total{{endpoint="{e}"}} {t[1]:.6f}' for e, t in sorted(data.items())]
+
+        # Component stats (password pool, db pools, caches...): strings become labels
+        for prefix, stats in self._sources:
+            result = stats()
+            for values in (result if isinstance(result, list) else [result]):
+                labels = ",".join(f'{k}="{v}"' for k, v in values.items() if isinstance(v, str))
+                labels = f"{{{labels}}}" if labels else ""
+                for key, value in values.items():
+                    if isinstance(value, (bool, int, float)):
+                        lines.append(f"planit_{prefix}_{key}{labels} {float(value):g}")
+
+        return "\n".join(lines) + "\n"
+
+
+# Shared instance (one per worker process)
+metrics = RequestMetrics()
+
+
+def track_sql(conn):
+    """Wrap a pooled connection so its statements count toward the current request"""
+
+    if not metrics.enabled and not sql_observers:
+        return conn
+    stats = g.get("sql_stats")
+    if stats is None:
+        stats = g.sql_stats = [0, 0.0]
+    return TimedConnection(conn, stats)
+
+
+def init_metrics(app):
+    """Time every request/render and serve /metrics to holders of METRICS_TOKEN"""
+
+    metrics.enabled = app.config.get("METRICS_ENABLED", True)
+    if not metrics.enabled:
+        return metrics
+
+    @app.before_request
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+        g.render_stats = [0, 0.0]
+        g.render_starts = []
+
+    def render_started(sender, template, context, **extra):
+        starts = g.get("render_starts")
+        if starts is not None:
+            starts.append(time.perf_counter())
+
+    def render_finished(sender, template, context, **extra):
+        # Only outermost renders count (a template rendered while rendering another is included)
+        starts = g.get("render_starts")
+        if starts:
+            start = starts.pop()
+            if not starts:
+                g.render_stats[0] += 1
+                g.render_stats[1] += time.perf_counter() - start
+
+    before_render_template.connect(render_started, app, weak=False)
+    template_rendered.connect(render_finished, app, weak=False)
+
+    @app.after_request
+    def record_request(response):
+        start = g.get("metrics_start")
+        if start is not None:
+            metrics.observe(request.endpoint or "unmatched", request.method, response.status_code,
+                            time.perf_counter() - start, g.get("sql_stats", (0, 0.0)), g.render_stats)
+        return response
+
+    # No token configured: collectors still run, but there is no public /metrics (404)
+    token = app.config.get("METRICS_TOKEN")
+    if not token:
+        return metrics
+
+    @app.route("/metrics")
+    def metrics_endpoint():
+        """Prometheus scrape target (per worker process)"""
+
+        if not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+            abort(401)
+        return Response(metrics.export(), mimetype="text/plain; version=0.0.4")
+
+    return metrics
@@ -0,0 +1,134 @@
+import argparse
+import importlib.util
+import os
+import re
+import sqlite3
+
+# Numbered migrations live in migrations/ as NNNN_name.sql or NNNN_name.py
+# (.py files define upgrade(db) and receive an open sqlite3 connection)
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+DEFAULT_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "planit.db")
+
+FILE_PATTERN = re.compile(r"^(\d+)_([\w-]+)\.(sql|py)$")
+
+
+def find_migrations(directory=MIGRATIONS_DIR):
+    """Return sorted list of (version, name, path) found in directory"""
+
+    migrations = []
+    for file_name in os.listdir(directory):
+        match = FILE_PATTERN.match(file_name)
+        if match:
+            version, name, _ = match.groups()
+            migrations.append((int(version), name, os.path.join(directory, file_name)))
+    migrations.sort()
+
+    # Ensure no two files claim the same version
+    versions = [m[0] for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError("Duplicate migration version in " + directory)
+    return migrations
+
+
+def ensure_version_table(db):
+    """Create schema_version table if missing"""
+
+    db.execute("""CREATE TABLE IF NOT EXISTS schema_version (
+                      version INTEGER PRIMARY KEY,
+                      name TEXT NOT NULL,
+                      applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                  )""")
+
+
+def applied_versions(db):
+    """Return set of migration versions already applied"""
+
+    ensure_version_table(db)
+    return {row[0] for row in db.execute("SELECT version FROM schema_version")}
+
+
+def apply_migration(db, version, name, path):
+    """Run one migration and record it, all inside a single transaction"""
+
+    # Take the write lock first so concurrent workers apply each migration once
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        if db.execute("SELECT 1 FROM schema_version WHERE version = ?", (version,)).fetchone():
+            db.execute("ROLLBACK")
+            return False
+
+        if path.endswith(".sql"):
+            with open(path, encoding="utf-8") as f:
+                script = f.read()
+            # Adapted from: Python documentation - sqlite3.complete_statement
+            # URL: https://docs.python.org/3/library/sqlite3.html#sqlite3.complete_statement
+            # Run statement by statement (executescript would commit our transaction)
+            statement = ""
+            for line in script.splitlines(keepends=True):
+                statement += line
+                if sqlite3.complete_statement(statement):
+                    db.execute(statement)
+                    statement = ""
+            if statement.strip() and not statement.strip().startswith("--"):
+                raise RuntimeError(f"Incomplete SQL statement at end of {path}")
+        else:
+            spec = importlib.util.spec_from_file_location(f"migration_{version:04d}", path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            module.upgrade(db)
+
+        db.execute("INSERT INTO schema_version (version, name) VALUES (?, ?)", (version, name))
+        db.execute("COMMIT")
+    except Exception:
+        if db.in_transaction:
+            db.execute("ROLLBACK")
+        raise
+    return True
+
+
+def migrate(db_path=DEFAULT_DB, target=None, verbose=False):
+    """Apply pending migrations up to target (all if None), return versions applied"""
+
+    # Autocommit mode: transactions are managed explicitly in apply_migration
+    db = sqlite3.connect(db_path, isolation_level=None)
+    db.execute("PRAGMA busy_timeout = 5000")
+    applied = []
+    try:
+        done = applied_versions(db)
+        for version, name, path in find_migrations():
+            if version in done or (target is not None and version > target):
+                continue
+            if apply_migration(db, version, name, path):
+                applied.append(version)
+                if verbose:
+                    print(f"applied {version:04d}_{name}")
+    finally:
+        db.close()
+    return applied
+
+
+def status(db_path=DEFAULT_DB):
+    """Return list of (version, name, applied) for every known migration"""
+
+    db = sqlite3.connect(db_path)
+    try:
+        done = applied_versions(db)
+        db.commit()
+    finally:
+        db.close()
+    return [(version, name, version in done) for version, name, _ in find_migrations()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply schema migrations to planit.db")
+    parser.add_argument("--db", default=DEFAULT_DB, help="path to sqlite database")
+    parser.add_argument("--to", type=int, help="stop after this version")
+    parser.add_argument("--status", action="store_true", help="list migrations and exit")
+    args = parser.parse_args()
+
+    if args.status:
+        for version, name, done in status(args.db):
+            print(f"{version:04d}_{name}: {'applied' if done else 'pending'}")
+    else:
+        if not migrate(args.db, target=args.to, verbose=True):
+            print("up to date")
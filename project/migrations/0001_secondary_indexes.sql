@@ -0,0 +1,20 @@
+-- Secondary indexes for the hot route queries (all were full table scans)
+
+-- dashboard, evaluate_event, system_check: invites by event (+ expiry for the sweep)
+CREATE INDEX IF NOT EXISTS idx_invites_event ON invites (event_id, expires_at);
+
+-- dashboard: events answered by the user (covers invite_id, res)
+CREATE INDEX IF NOT EXISTS idx_responses_user ON responses (user_id, invite_id, res);
+
+-- dashboard: events created by the user, newest first
+CREATE INDEX IF NOT EXISTS idx_events_creator ON events (creator_id, created_at);
+
+-- common_check, show_response: dates picked per event (and per user)
+CREATE INDEX IF NOT EXISTS idx_event_dates_event_user ON event_dates (event_id, user_id, date);
+
+-- create_event, respond_event, show_response, choose_activities
+CREATE INDEX IF NOT EXISTS idx_activity_topics_event ON activity_topics (event_id);
+CREATE INDEX IF NOT EXISTS idx_activity_ideas_topic ON activity_ideas (topic_id, user_id);
+
+-- schedule_event
+CREATE INDEX IF NOT EXISTS idx_confirmed_activities_event ON confirmed_activities (event_id);
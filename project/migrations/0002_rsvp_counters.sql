@@ -0,0 +1,47 @@
+-- RSVP counters stored on the event, kept current by triggers on responses
+-- (rebuild with: python system_check.py --reconcile)
+
+ALTER TABLE events ADD COLUMN confirm_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE events ADD COLUMN decline_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE events ADD COLUMN pending_count INTEGER NOT NULL DEFAULT 0;
+
+-- "x IS 1" is 0/1 even when res is NULL (pending)
+CREATE TRIGGER IF NOT EXISTS trg_responses_insert_counts
+AFTER INSERT ON responses
+BEGIN
+    UPDATE events
+    SET confirm_count = confirm_count + (NEW.res IS 1),
+        decline_count = decline_count + (NEW.res IS 0),
+        pending_count = pending_count + (NEW.res IS NULL)
+    WHERE id = (SELECT event_id FROM invites WHERE id = NEW.invite_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_responses_update_counts
+AFTER UPDATE OF res ON responses
+WHEN OLD.res IS NOT NEW.res
+BEGIN
+    UPDATE events
+    SET confirm_count = confirm_count - (OLD.res IS 1) + (NEW.res IS 1),
+        decline_count = decline_count - (OLD.res IS 0) + (NEW.res IS 0),
+        pending_count = pending_count - (OLD.res IS NULL) + (NEW.res IS NULL)
+    WHERE id = (SELECT event_id FROM invites WHERE id = NEW.invite_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_responses_delete_counts
+AFTER DELETE ON responses
+BEGIN
+    UPDATE events
+    SET confirm_count = confirm_count - (OLD.res IS 1),
+        decline_count = decline_count - (OLD.res IS 0),
+        pending_count = pending_count - (OLD.res IS NULL)
+    WHERE id = (SELECT event_id FROM invites WHERE id = OLD.invite_id);
+END;
+
+-- Backfill existing events
+UPDATE events
+SET confirm_count = (SELECT COUNT(*) FROM invites i JOIN responses r ON r.invite_id = i.id
+                     WHERE i.event_id = events.id AND r.res = 1),
+    decline_count = (SELECT COUNT(*) FROM invites i JOIN responses r ON r.invite_id = i.id
+                     WHERE i.event_id = events.id AND r.res = 0),
+    pending_count = (SELECT COUNT(*) FROM invites i JOIN responses r ON r.invite_id = i.id
+                     WHERE i.event_id = events.id AND r.res IS NULL);
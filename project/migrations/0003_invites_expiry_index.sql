@@ -0,0 +1,2 @@
+-- system_check.py sweep: range scan of expired invites
+CREATE INDEX IF NOT EXISTS idx_invites_expires ON invites (expires_at, event_id);
@@ -0,0 +1,29 @@
+-- Running count of picks per (event, date), kept current by triggers on event_dates
+CREATE TABLE IF NOT EXISTS event_date_tallies (
+    event_id INTEGER NOT NULL,
+    date DATE NOT NULL,
+    picks INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (event_id, date),
+    FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+-- Winning date lookup: most picks first, earliest date on ties
+CREATE INDEX IF NOT EXISTS idx_event_date_tallies_rank ON event_date_tallies (event_id, picks DESC, date);
+
+CREATE TRIGGER IF NOT EXISTS trg_event_dates_insert_tally
+AFTER INSERT ON event_dates
+BEGIN
+    INSERT INTO event_date_tallies (event_id, date, picks) VALUES (NEW.event_id, NEW.date, 1)
+    ON CONFLICT (event_id, date) DO UPDATE SET picks = picks + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_event_dates_delete_tally
+AFTER DELETE ON event_dates
+BEGIN
+    UPDATE event_date_tallies SET picks = picks - 1
+    WHERE event_id = OLD.event_id AND date = OLD.date;
+END;
+
+-- Backfill existing picks
+INSERT OR REPLACE INTO event_date_tallies (event_id, date, picks)
+SELECT event_id, date, COUNT(*) FROM event_dates GROUP BY event_id, date;
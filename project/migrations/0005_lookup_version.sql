@@ -0,0 +1,62 @@
+-- Version counter for the lookup tables cached in lookups.py
+-- Any edit to event_focuses/event_settings/event_statuses bumps it, so workers reload
+CREATE TABLE IF NOT EXISTS lookup_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL
+);
+
+INSERT OR IGNORE INTO lookup_version (id, version) VALUES (1, 1);
+
+CREATE TRIGGER IF NOT EXISTS trg_event_focuses_insert_version
+AFTER INSERT ON event_focuses
+BEGIN
+    UPDATE lookup_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_event_focuses_update_version
+AFTER UPDATE ON event_focuses
+BEGIN
+    UPDATE lookup_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_event_focuses_delete_version
+AFTER DELETE ON event_focuses
+BEGIN
+    UPDATE lookup_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_event_settings_insert_version
+AFTER INSERT ON event_settings
+BEGIN
+    UPDATE lookup_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_event_settings_update_version
+AFTER UPDATE ON event_settings
+BEGIN
+    UPDATE lookup_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_event_settings_delete_version
+AFTER DELETE ON event_settings
+BEGIN
+    UPDATE lookup_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_event_statuses_insert_version
+AFTER INSERT ON event_statuses
+BEGIN
+    UPDATE lookup_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_event_statuses_update_version
+AFTER UPDATE ON event_statuses
+BEGIN
+    UPDATE lookup_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_event_statuses_delete_version
+AFTER DELETE ON event_statuses
+BEGIN
+    UPDATE lookup_version SET version = version + 1 WHERE id = 1;
+END;
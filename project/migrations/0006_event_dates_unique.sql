@@ -0,0 +1,9 @@
+-- One row per (event, user, date): drop duplicates (tally trigger keeps counts right)
+DELETE FROM event_dates
+WHERE id NOT IN (SELECT MIN(id) FROM event_dates GROUP BY event_id, user_id, date);
+
+-- Unique index acts as the UNIQUE(event_id, user_id, date) constraint for INSERT OR IGNORE
+CREATE UNIQUE INDEX IF NOT EXISTS ux_event_dates_event_user_date ON event_dates (event_id, user_id, date);
+
+-- Same columns as the new unique index
+DROP INDEX IF EXISTS idx_event_dates_event_user;
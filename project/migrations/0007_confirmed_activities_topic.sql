@@ -0,0 +1,5 @@
+-- One confirmed pick per topic, so concurrent confirmations can't insert twice
+-- (rows confirmed before this migration keep topic_id NULL)
+ALTER TABLE confirmed_activities ADD COLUMN topic_id INTEGER REFERENCES activity_topics(id) ON DELETE CASCADE;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_confirmed_activities_topic ON confirmed_activities (topic_id);
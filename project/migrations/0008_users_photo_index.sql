@@ -0,0 +1,2 @@
+-- Reference count lookup for shared (content-addressed) photos in remove_photo
+CREATE INDEX IF NOT EXISTS idx_users_photo ON users (photo);
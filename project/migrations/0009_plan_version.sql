@@ -0,0 +1,47 @@
+-- Version of a confirmed event's rendered plan (page_cache.py), bumped whenever
+-- the attendee list shown on /scheduled/<token> changes
+
+ALTER TABLE events ADD COLUMN plan_version INTEGER NOT NULL DEFAULT 0;
+
+-- Attendee renamed or changed photo
+CREATE TRIGGER IF NOT EXISTS trg_users_update_plan_version
+AFTER UPDATE OF username, photo ON users
+WHEN OLD.username IS NOT NEW.username OR OLD.photo IS NOT NEW.photo
+BEGIN
+    UPDATE events
+    SET plan_version = plan_version + 1
+    WHERE status_id = 1
+      AND id IN (SELECT i.event_id FROM responses r JOIN invites i ON i.id = r.invite_id
+                 WHERE r.user_id = NEW.id AND r.res = 1);
+END;
+
+-- Attendee deleted their account (before delete: responses still point at them)
+CREATE TRIGGER IF NOT EXISTS trg_users_delete_plan_version
+BEFORE DELETE ON users
+BEGIN
+    UPDATE events
+    SET plan_version = plan_version + 1
+    WHERE status_id = 1
+      AND id IN (SELECT i.event_id FROM responses r JOIN invites i ON i.id = r.invite_id
+                 WHERE r.user_id = OLD.id AND r.res = 1);
+END;
+
+-- Attendance changed after confirmation
+CREATE TRIGGER IF NOT EXISTS trg_responses_update_plan_version
+AFTER UPDATE OF res ON responses
+WHEN OLD.res IS NOT NEW.res
+BEGIN
+    UPDATE events
+    SET plan_version = plan_version + 1
+    WHERE status_id = 1
+      AND id = (SELECT event_id FROM invites WHERE id = NEW.invite_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_responses_delete_plan_version
+AFTER DELETE ON responses
+BEGIN
+    UPDATE events
+    SET plan_version = plan_version + 1
+    WHERE status_id = 1
+      AND id = (SELECT event_id FROM invites WHERE id = OLD.invite_id);
+END;
@@ -0,0 +1,69 @@
+-- Dashboard timeline: one row per event a user created or answered, kept in dashboard
+-- order (newest first) so each keyset page is a single index range whatever the page number
+
+CREATE TABLE IF NOT EXISTS user_events (
+    user_id INTEGER NOT NULL,
+    created_at DATETIME NOT NULL,
+    event_id INTEGER NOT NULL,
+    status_id INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, created_at, event_id)
+) WITHOUT ROWID;
+
+-- Status-filtered pages, and per-event maintenance below
+CREATE INDEX IF NOT EXISTS idx_user_events_status ON user_events (user_id, status_id, created_at, event_id);
+CREATE INDEX IF NOT EXISTS idx_user_events_event ON user_events (event_id);
+
+CREATE TRIGGER IF NOT EXISTS trg_events_insert_timeline
+AFTER INSERT ON events
+BEGIN
+    INSERT OR IGNORE INTO user_events (user_id, created_at, event_id, status_id)
+    VALUES (NEW.creator_id, COALESCE(NEW.created_at, ''), NEW.id, COALESCE(NEW.status_id, 0));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_events_update_timeline
+AFTER UPDATE OF status_id ON events
+WHEN OLD.status_id IS NOT NEW.status_id
+BEGIN
+    UPDATE user_events SET status_id = COALESCE(NEW.status_id, 0) WHERE event_id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_events_delete_timeline
+AFTER DELETE ON events
+BEGIN
+    DELETE FROM user_events WHERE event_id = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_responses_insert_timeline
+AFTER INSERT ON responses
+BEGIN
+    INSERT OR IGNORE INTO user_events (user_id, created_at, event_id, status_id)
+    SELECT NEW.user_id, COALESCE(e.created_at, ''), e.id, COALESCE(e.status_id, 0)
+    FROM invites i JOIN events e ON e.id = i.event_id
+    WHERE i.id = NEW.invite_id;
+END;
+
+-- Creator keeps the event even without a response row
+CREATE TRIGGER IF NOT EXISTS trg_responses_delete_timeline
+AFTER DELETE ON responses
+BEGIN
+    DELETE FROM user_events
+    WHERE user_id = OLD.user_id
+      AND event_id IN (SELECT e.id FROM invites i JOIN events e ON e.id = i.event_id
+                       WHERE i.id = OLD.invite_id AND e.creator_id IS NOT OLD.user_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_users_delete_timeline
+AFTER DELETE ON users
+BEGIN
+    DELETE FROM user_events WHERE user_id = OLD.id;
+END;
+
+-- Backfill
+INSERT OR IGNORE INTO user_events (user_id, created_at, event_id, status_id)
+SELECT creator_id, COALESCE(created_at, ''), id, COALESCE(status_id, 0) FROM events;
+
+INSERT OR IGNORE INTO user_events (user_id, created_at, event_id, status_id)
+SELECT r.user_id, COALESCE(e.created_at, ''), e.id, COALESCE(e.status_id, 0)
+FROM responses r
+JOIN invites i ON i.id = r.invite_id
+JOIN events e ON e.id = i.event_id;
@@ -0,0 +1,15 @@
+-- Change version per event for the status API (ETag / long-poll), bumped whenever
+-- status, chosen date or RSVP counters change
+
+ALTER TABLE events ADD COLUMN version INTEGER NOT NULL DEFAULT 0;
+
+CREATE TRIGGER IF NOT EXISTS trg_events_update_version
+AFTER UPDATE OF status_id, chosen_date, confirm_count, decline_count, pending_count ON events
+WHEN OLD.status_id IS NOT NEW.status_id
+  OR OLD.chosen_date IS NOT NEW.chosen_date
+  OR OLD.confirm_count IS NOT NEW.confirm_count
+  OR OLD.decline_count IS NOT NEW.decline_count
+  OR OLD.pending_count IS NOT NEW.pending_count
+BEGIN
+    UPDATE events SET version = version + 1 WHERE id = NEW.id;
+END;
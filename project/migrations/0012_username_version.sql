@@ -0,0 +1,16 @@
+-- Rename counter for the username Bloom filter in usernames.py
+-- New users are picked up by id; a rename frees one name and takes another, so
+-- it bumps the counter and workers rebuild their filter
+CREATE TABLE IF NOT EXISTS username_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL
+);
+
+INSERT OR IGNORE INTO username_version (id, version) VALUES (1, 1);
+
+CREATE TRIGGER IF NOT EXISTS trg_users_username_version
+AFTER UPDATE OF username ON users
+WHEN OLD.username IS NOT NEW.username
+BEGIN
+    UPDATE username_version SET version = version + 1 WHERE id = 1;
+END;
@@ -0,0 +1,53 @@
+-- pending_count = invitees who haven't answered yet (expected_total - confirmed - declined),
+-- the same "pending" responses_check works with. 0002 counted response rows with
+-- res IS NULL, which misses invitees that have no row at all.
+
+DROP TRIGGER IF EXISTS trg_responses_insert_counts;
+DROP TRIGGER IF EXISTS trg_responses_update_counts;
+DROP TRIGGER IF EXISTS trg_responses_delete_counts;
+
+-- New events start with everyone pending (the creator's own response follows)
+CREATE TRIGGER IF NOT EXISTS trg_events_insert_pending
+AFTER INSERT ON events
+BEGIN
+    UPDATE events
+    SET pending_count = NEW.expected_total - NEW.confirm_count - NEW.decline_count
+    WHERE id = NEW.id;
+END;
+
+-- "x IS 1" is 0/1 even when res is NULL (not answered)
+CREATE TRIGGER IF NOT EXISTS trg_responses_insert_counts
+AFTER INSERT ON responses
+BEGIN
+    UPDATE events
+    SET confirm_count = confirm_count + (NEW.res IS 1),
+        decline_count = decline_count + (NEW.res IS 0),
+        pending_count = pending_count - (NEW.res IS NOT NULL)
+    WHERE id = (SELECT event_id FROM invites WHERE id = NEW.invite_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_responses_update_counts
+AFTER UPDATE OF res ON responses
+WHEN OLD.res IS NOT NEW.res
+BEGIN
+    UPDATE events
+    SET confirm_count = confirm_count - (OLD.res IS 1) + (NEW.res IS 1),
+        decline_count = decline_count - (OLD.res IS 0) + (NEW.res IS 0),
+        pending_count = pending_count + (OLD.res IS NOT NULL) - (NEW.res IS NOT NULL)
+    WHERE id = (SELECT event_id FROM invites WHERE id = NEW.invite_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_responses_delete_counts
+AFTER DELETE ON responses
+BEGIN
+    UPDATE events
+    SET confirm_count = confirm_count - (OLD.res IS 1),
+        decline_count = decline_count - (OLD.res IS 0),
+        pending_count = pending_count + (OLD.res IS NOT NULL)
+    WHERE id = (SELECT event_id FROM invites WHERE id = OLD.invite_id);
+END;
+
+-- Backfill existing events
+UPDATE events
+SET pending_count = expected_total - (SELECT COUNT(*) FROM invites i JOIN responses r ON r.invite_id = i.id
+                                      WHERE i.event_id = events.id AND r.res IS NOT NULL);
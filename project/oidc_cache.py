@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+import requests
+from authlib.integrations.flask_client import FlaskOAuth2App
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".oidc_cache")
+
+
+class DocumentCache:
+    """JSON documents (OIDC discovery, JWKS) cached in memory and on disk
+
+    Fresh (within max-age, or ttl if the response has none): served from memory.
+    Stale for up to stale_ttl more: served at once while a background thread refetches.
+    Older or missing: fetched inline. A failed fetch keeps serving whatever copy exists,
+    and a url is refetched at most once per retry_interval unless there is no copy at all.
+    The disk copy lets a fresh worker (deploy, recycle) start without a round-trip.
+    """
+
+    def __init__(self, directory=DEFAULT_DIR, ttl=3600.0, stale_ttl=86400.0, timeout=5.0, retry_interval=60.0):
+        self.directory = directory
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self.logger = None
+        self._docs = {}              # url -> (fetched_at, max_age, document)
+        self._attempts = {}          # url -> time of last fetch attempt
+        self._refreshing = set()     # urls with a background refetch running
+        self._lock = threading.Lock()
+
+        # Counters exposed via stats()
+        self.hits = 0
+        self.stale_hits = 0
+        self.disk_loads = 0
+        self.fetches = 0
+        self.errors = 0
+
+    def get(self, url, force=False):
+        """Return the document at url, fetching inline only when no usable copy exists
+
+        force: refetch now (e.g. unknown signing key), at most once per retry_interval
+        """
+
+        entry = self._docs.get(url) or self._load_disk(url)
+        if entry is None:
+            return self._fetch(url, None)
+
+        now = time.time()
+        may_fetch = now - self._attempts.get(url, 0) >= self.retry_interval
+        if force:
+            return self._fetch(url, entry) if may_fetch else entry[2]
+
+        fetched_at, max_age, document = entry
+        age = now - fetched_at
+        # Another worker may have refetched already
+        if age >= max_age:
+            newer = self._load_disk(url)
+            if newer is not None:
+                fetched_at, max_age, document = newer
+                age = now - fetched_at
+        if age < max_age:
+            self.hits += 1
+            return document
+        # Stale, or expired but last attempt just failed (IdP down): serve what we have
+        if age < max_age + self.stale_ttl or not may_fetch:
+            self.stale_hits += 1
+            if may_fetch:
+                self.refresh_async(url)
+            return document
+        return self._fetch(url, entry)
+
+    def refresh_async(self, url):
+        """Refetch url on a background thread (one at a time per url)"""
+
+        with self._lock:
+            if url in self._refreshing:
+                return
+            self._refreshing.add(url)
+
+        def run():
+            try:
+                self._fetch(url, self._docs.get(url))
+            finally:
+                with self._lock:
+                    self._refreshing.discard(url)
+
+        threading.Thread(target=run, name="oidc-refresh", daemon=True).start()
+
+    def _fetch(self, url, fallback):
+        """GET url, store in memory and on disk; on failure return fallback's document (or raise)"""
+
+        self._attempts[url] = time.time()
+        try:
+            response = requests.get(url, timeout=self.timeout)
+            response.raise_for_status()
+            document = response.json()
+        except (requests.RequestException, ValueError) as error:
+            self.errors += 1
+            if fallback is None:
+                raise
+            if self.logger:
+                self.logger.warning("OIDC fetch of %s failed (%s), serving cached copy", url, error)
+            return fallback[2]
+
+        self.fetches += 1
+        match = re.search(r"max-age=(\d+)", response.headers.get("Cache-Control", ""))
+        max_age = int(match.group(1)) if match else self.ttl
+        self._docs[url] = entry = (time.time(), max_age, document)
+        self._store_disk(url, entry)
+        return document
+
+    def _path(self, url):
+        return os.path.join(self.directory, hashlib.sha256(url.encode()).hexdigest()[:32] + ".json")
+
+    def _load_disk(self, url):
+        """Read url's copy written by any worker (None if missing/corrupt or not newer than memory)"""
+
+        try:
+            with open(self._path(url), encoding="utf-8") as f:
+                saved = json.load(f)
+            entry = (saved["fetched_at"], saved["max_age"], saved["document"])
+        except (OSError, ValueError, KeyError):
+            return None
+        current = self._docs.get(url)
+        if current is not None and current[0] >= entry[0]:
+            return None
+        self.disk_loads += 1
+        self._docs[url] = entry
+        return entry
+
+    def _store_disk(self, url, entry):
+        # Temp file + rename so other workers never read a half-written copy
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"url": url, "fetched_at": entry[0], "max_age": entry[1], "document": entry[2]}, f)
+            os.replace(tmp, self._path(url))
+        except OSError:
+            if self.logger:
+                self.logger.warning("Could not write OIDC cache for %s", url, exc_info=True)
+
+    def stats(self):
+        """Return cache counters as a dict"""
+
+        return {
+            "documents": len(self._docs),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "disk_loads": self.disk_loads,
+            "fetches": self.fetches,
+            "errors": self.errors,
+        }
+
+
+# Shared instance (one per worker process, disk copy shared by all)
+oidc_documents = DocumentCache(
+    directory=os.environ.get("OIDC_CACHE_DIR", DEFAULT_DIR),
+    ttl=float(os.environ.get("OIDC_CACHE_TTL", 3600)),
+    stale_ttl=float(os.environ.get("OIDC_CACHE_STALE", 86400)),
+)
+
+
+class CachedOIDCApp(FlaskOAuth2App):
+    """Authlib client reading discovery metadata and JWKS through oidc_documents
+
+    Authlib itself fetches both once per process and keeps them forever.
+    """
+
+    def load_server_metadata(self):
+        if self._server_metadata_url:
+            self.server_metadata.update(oidc_documents.get(self._server_metadata_url))
+        return self.server_metadata
+
+    def fetch_jwk_set(self, force=False):
+        metadata = self.load_server_metadata()
+        uri = metadata.get("jwks_uri")
+        if not uri:
+            raise RuntimeError('Missing "jwks_uri" in metadata')
+        return oidc_documents.get(uri, force=force)
+
+
+def warm(metadata_url, logger=None):
+    """Load discovery and JWKS in the background so the first login doesn't wait on them"""
+
+    def run():
+        try:
+            metadata = oidc_documents.get(metadata_url)
+            oidc_documents.get(metadata["jwks_uri"])
+        except (requests.RequestException, ValueError, KeyError):
+            if logger:
+                logger.warning("OIDC warm-up of %s failed", metadata_url, exc_info=True)
+
+    threading.Thread(target=run, name="oidc-warm", daemon=True).start()
+
@@ -0,0 +1,90 @@
+import os
+import threading
+
+from collections import OrderedDict
+
+
+class FragmentCache:
+    """LRU of rendered HTML fragments keyed by (id, version), bounded by entries and bytes
+
+    A lookup with a newer version than the stored one is a miss and replaces it,
+    so callers never need to invalidate on change, only pass the current version.
+    """
+
+    def __init__(self, max_entries=1000, max_bytes=16 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()   # id -> (version, html, size in bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        # Counters exposed via stats()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, version):
+        """Return cached html for key at version (None on miss)"""
+
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, version, html):
+        """Store html for key at version, evicting least recently used past the bounds"""
+
+        size = len(html.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._data[key] = (version, html, size)
+            self._bytes += size
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self._bytes -= evicted[2]
+                self.evictions += 1
+
+    def discard(self, key):
+        """Drop key (e.g. event deleted)"""
+
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+
+    def clear(self):
+        """Drop every entry and reset counters (e.g. benchmark switching databases)"""
+
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """Return counters and hit rate as a dict"""
+
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Rendered confirmed plans for /scheduled/<token> (one per worker process)
+plan_cache = FragmentCache(
+    max_entries=int(os.environ.get("PLAN_CACHE_ENTRIES", 1000)),
+    max_bytes=int(os.environ.get("PLAN_CACHE_BYTES", 16 * 1024 * 1024)),
+)
@@ -0,0 +1,157 @@
+import argparse
+import os
+import statistics
+import threading
+import time
+
+from argon2 import PasswordHasher
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PasswordBusyError(Exception):
+    """Raised when too many password hashes/verifies are already queued"""
+
+
+class PasswordPool:
+    """PasswordHasher whose hash/verify run on a bounded worker pool
+
+    argon2-cffi releases the GIL while hashing, so threads run in parallel
+    while capping how many cores Argon2 can take from the rest of the app.
+    Same interface as PasswordHasher (hash, verify, check_needs_rehash).
+    """
+
+    def __init__(self, time_cost=3, memory_cost=65536, parallelism=4, workers=2, queue_max=16, wait=2.0):
+        self.hasher = PasswordHasher(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+        self.workers = workers
+        self.queue_max = queue_max
+        self.wait = wait
+
+        # Slots = running + queued jobs; when all are taken callers back off
+        self._slots = threading.BoundedSemaphore(workers + queue_max)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+        # Counters exposed via stats()
+        self.calls = 0
+        self.rejected = 0
+        self.busy_time = 0.0
+
+    def _pool(self):
+        """Return this process's executor (new one after fork)"""
+
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="argon2")
+                    self._pid = os.getpid()
+        return self._executor
+
+    def _run(self, fn, *args):
+        """Run fn on the pool and wait for its result (raises PasswordBusyError if full)"""
+
+        if not self._slots.acquire(timeout=self.wait):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordBusyError("Password workers busy")
+        start = time.perf_counter()
+        try:
+            return self._pool().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+            with self._lock:
+                self.calls += 1
+                self.busy_time += time.perf_counter() - start
+
+    def hash(self, password):
+        """Hash password with Argon2 on the pool"""
+
+        return self._run(self.hasher.hash, password)
+
+    def verify(self, hash, password):
+        """Verify password on the pool (raises VerifyMismatchError like PasswordHasher)"""
+
+        return self._run(self.hasher.verify, hash, password)
+
+    def check_needs_rehash(self, hash):
+        """True if hash was made with different parameters (cheap, runs inline)"""
+
+        return self.hasher.check_needs_rehash(hash)
+
+    def stats(self):
+        """Return pool counters as a dict"""
+
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_max": self.queue_max,
+                "calls": self.calls,
+                "rejected": self.rejected,
+                "busy_time": round(self.busy_time, 6),
+            }
+
+
+def from_env():
+    """Build PasswordPool from ARGON2_* / PASSWORD_* environment variables"""
+
+    return PasswordPool(
+        time_cost=int(os.environ.get("ARGON2_TIME_COST", 3)),
+        memory_cost=int(os.environ.get("ARGON2_MEMORY_COST", 65536)),   # KiB
+        parallelism=int(os.environ.get("ARGON2_PARALLELISM", 4)),
+        workers=int(os.environ.get("PASSWORD_WORKERS", min(4, os.cpu_count() or 1))),
+        queue_max=int(os.environ.get("PASSWORD_QUEUE_MAX", 16)),
+        wait=float(os.environ.get("PASSWORD_QUEUE_WAIT", 2.0)),
+    )
+
+
+def measure_verify(time_cost, memory_cost, parallelism, rounds=5):
+    """Return median verify time (seconds) for the given Argon2 parameters"""
+
+    hasher = PasswordHasher(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+    stored = hasher.hash("calibration-password")
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        hasher.verify(stored, "calibration-password")
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def calibrate(target_ms=250, memory_cost=65536, parallelism=4, rounds=5, verbose=False):
+    """Pick the strongest time_cost (halving memory if needed) with verify <= target_ms"""
+
+    # Lower memory until a single pass fits the target (never below 8 MiB)
+    while memory_cost > 8192 and measure_verify(1, memory_cost, parallelism, rounds) * 1000 > target_ms:
+        memory_cost //= 2
+
+    # Raise passes while verify stays within the target
+    time_cost = 1
+    elapsed = measure_verify(time_cost, memory_cost, parallelism, rounds)
+    if verbose:
+        print(f"t={time_cost} m={memory_cost} p={parallelism}: {elapsed * 1000:.1f}ms")
+    while time_cost < 20:
+        candidate = measure_verify(time_cost + 1, memory_cost, parallelism, rounds)
+        if verbose:
+            print(f"t={time_cost + 1} m={memory_cost} p={parallelism}: {candidate * 1000:.1f}ms")
+        if candidate * 1000 > target_ms:
+            break
+        time_cost += 1
+        elapsed = candidate
+
+    return {"time_cost": time_cost, "memory_cost": memory_cost, "parallelism": parallelism,
+            "verify_ms": round(elapsed * 1000, 1)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Calibrate Argon2 cost parameters for this host")
+    parser.add_argument("--target-ms", type=float, default=250, help="target verify latency")
+    parser.add_argument("--memory-cost", type=int, default=65536, help="starting memory cost (KiB)")
+    parser.add_argument("--parallelism", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=5, help="verifies measured per setting")
+    args = parser.parse_args()
+
+    result = calibrate(args.target_ms, args.memory_cost, args.parallelism, args.rounds, verbose=True)
+    print(f"\n# verify ~{result['verify_ms']}ms on this host")
+    print(f"ARGON2_TIME_COST={result['time_cost']}")
+    print(f"ARGON2_MEMORY_COST={result['memory_cost']}")
+    print(f"ARGON2_PARALLELISM={result['parallelism']}")
@@ -0,0 +1,115 @@
+import hashlib
+import io
+import os
+import re
+import tempfile
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# Stored sizes (square, pixels): avatar for account page/navbar, thumbnail for attendee lists
+AVATAR_SIZE = 256
+THUMB_SIZE = 64
+CHUNK_SIZE = 64 * 1024
+
+# Refuse images that would decode to more than this many pixels (decompression bombs)
+Image.MAX_IMAGE_PIXELS = 40_000_000
+
+# /static/uploads/<2 hex>/<2 hex>/<sha256>_<size>.jpg
+UPLOAD_WEB_DIR = "/static/uploads"
+HASHED_PHOTO = re.compile(r"^/static/uploads/([0-9a-f]{2})/([0-9a-f]{2})/([0-9a-f]{64})_(\d+)\.jpg$")
+
+
+class PhotoError(ValueError):
+    """Raised when an upload is too large or not a readable image"""
+
+
+def read_capped(stream, max_bytes):
+    """Read stream in chunks, stop as soon as it passes max_bytes
+
+    Werkzeug has already spooled the whole upload by now, so this only caps what gets
+    decoded; the request size itself is bounded by MAX_CONTENT_LENGTH.
+    """
+
+    buffer = io.BytesIO()
+    total = 0
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        total += len(chunk)
+        if total > max_bytes:
+            raise PhotoError(f"photo over {max_bytes // (1024 * 1024)} MB")
+        buffer.write(chunk)
+    return buffer.getvalue()
+
+
+def _square(image, size):
+    """Return JPEG bytes of image center-cropped and resized to size x size"""
+
+    out = io.BytesIO()
+    ImageOps.fit(image, (size, size), Image.LANCZOS).save(out, "JPEG", quality=85, optimize=True)
+    return out.getvalue()
+
+
+def render_photo(data):
+    """Decode upload bytes, return (sha256 hex, {size: JPEG bytes}) for every stored size"""
+
+    try:
+        image = Image.open(io.BytesIO(data))
+        # Let the JPEG decoder downscale while decoding (much faster for camera photos)
+        image.draft("RGB", (AVATAR_SIZE * 2, AVATAR_SIZE * 2))
+        image = ImageOps.exif_transpose(image).convert("RGB")
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError):
+        raise PhotoError("not a supported image")
+
+    digest = hashlib.sha256(data).hexdigest()
+    return digest, {size: _square(image, size) for size in (AVATAR_SIZE, THUMB_SIZE)}
+
+
+def photo_web_path(digest, size=AVATAR_SIZE):
+    """Return sharded web path of a stored photo size"""
+
+    return f"{UPLOAD_WEB_DIR}/{digest[:2]}/{digest[2:4]}/{digest}_{size}.jpg"
+
+
+def store_photo(root, digest, renders):
+    """Write missing sizes of a rendered photo under root, return avatar web path
+
+    Identical uploads share the same files (written once).
+    """
+
+    for size, content in renders.items():
+        file_path = os.path.join(root, photo_web_path(digest, size).lstrip("/"))
+        if os.path.isfile(file_path):
+            continue
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+        # Write to a temp file then rename, so readers never see a half-written photo
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, file_path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    return photo_web_path(digest)
+
+
+def photo_files(web_path):
+    """Return web paths of every stored file behind a photo (all sizes if content-addressed)"""
+
+    match = HASHED_PHOTO.match(web_path or "")
+    if match:
+        return [photo_web_path(match.group(3), size) for size in (AVATAR_SIZE, THUMB_SIZE)]
+    return [web_path]
+
+
+def thumb_url(web_path):
+    """Template filter: thumbnail of a stored photo (other urls unchanged)"""
+
+    match = HASHED_PHOTO.match(web_path or "")
+    if match:
+        return photo_web_path(match.group(3), THUMB_SIZE)
+    return web_path
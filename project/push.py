@@ -0,0 +1,421 @@
+import argparse
+import hmac
+import json
+import os
+import queue
+import random
+import selectors
+import socket
+import socketserver
+import statistics
+import threading
+import time
+
+
+class Subscription:
+    """One open SSE stream: bounded queue of (event, data) for a user"""
+
+    def __init__(self, user_id, maxsize):
+        self.user_id = user_id
+        self.queue = queue.Queue(maxsize)
+        self.lagging = False         # Queue overflowed: stream asks client to resync and closes
+
+
+class PushBroker:
+    """In-process pub/sub of per-user messages for SSE streams
+
+    publish() delivers to this worker's subscribers and forwards to the relay
+    (if connected) so other worker processes deliver to theirs.
+    """
+
+    def __init__(self, queue_size=100, max_subscribers=5000, heartbeat=15.0, retry_ms=3000):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.heartbeat = heartbeat
+        self.retry_ms = retry_ms
+        self.relay = None
+        self._subs = {}              # user_id -> set of Subscription
+        self._count = 0
+        self._lock = threading.Lock()
+
+        # Counters exposed via stats()
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.rejected = 0
+
+    def subscribe(self, user_id):
+        """Register a stream for user_id (None when max_subscribers reached)"""
+
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                self.rejected += 1
+                return None
+            sub = Subscription(user_id, self.queue_size)
+            self._subs.setdefault(user_id, set()).add(sub)
+            self._count += 1
+            return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            subs = self._subs.get(sub.user_id)
+            if subs and sub in subs:
+                subs.discard(sub)
+                self._count -= 1
+                if not subs:
+                    del self._subs[sub.user_id]
+
+    def listening(self):
+        """True if a publish could reach anyone (local streams or other workers via relay)"""
+
+        return self._count > 0 or self.relay is not None
+
+    def deliver(self, user_ids, event, data):
+        """Queue message for this worker's streams of user_ids (never blocks)"""
+
+        with self._lock:
+            targets = [sub for user_id in user_ids for sub in self._subs.get(user_id, ())]
+        for sub in targets:
+            try:
+                sub.queue.put_nowait((event, data))
+                self.delivered += 1
+            except queue.Full:
+                # Slow client: stop queueing, its stream tells it to resync
+                sub.lagging = True
+                self.dropped += 1
+
+    def publish(self, user_ids, event, data):
+        """Deliver locally and fan out to other workers through the relay"""
+
+        user_ids = list(user_ids)
+        self.published += 1
+        self.deliver(user_ids, event, data)
+        if self.relay is not None:
+            self.relay.send({"users": user_ids, "event": event, "data": data})
+
+    def stream(self, sub):
+        """Yield SSE text for sub until the client goes away (or lags behind)"""
+
+        try:
+            # Jittered reconnect delay so a restart doesn't bring every client back at once
+            yield f"retry: {int(self.retry_ms * random.uniform(1, 2))}\n\n"
+            while True:
+                try:
+                    event, data = sub.queue.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    yield ": ping\n\n"
+                    continue
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+                if sub.lagging:
+                    yield "event: resync\ndata: {}\n\n"
+                    return
+        finally:
+            self.unsubscribe(sub)
+
+    def stats(self):
+        """Return broker counters as a dict"""
+
+        with self._lock:
+            return {
+                "subscribers": self._count,
+                "users": len(self._subs),
+                "published": self.published,
+                "delivered": self.delivered,
+                "dropped": self.dropped,
+                "rejected": self.rejected,
+                "relay_connected": bool(self.relay and self.relay.connected),
+            }
+
+
+class RelayClient:
+    """Connection from one worker to the local relay, reconnecting with backoff"""
+
+    def __init__(self, broker, address, secret):
+        host, port = address.rsplit(":", 1)
+        self.address = (host, int(port))
+        self.secret = secret
+        self.broker = broker
+        self.connected = False
+        self._sock = None
+        self._send_lock = threading.Lock()
+        self._pid = None
+
+    def start(self):
+        """Start reader thread once per worker process"""
+
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        threading.Thread(target=self._run, name="push-relay", daemon=True).start()
+
+    def send(self, message):
+        """Forward message to other workers (dropped while disconnected)"""
+
+        line = (json.dumps(message) + "\n").encode()
+        with self._send_lock:
+            if self._sock is None:
+                return
+            try:
+                self._sock.sendall(line)
+            except OSError:
+                self._sock = None
+
+    def _run(self):
+        backoff = 0.5
+        while True:
+            try:
+                sock = socket.create_connection(self.address, timeout=5)
+                # First line proves this is one of our workers (see RelayHandler)
+                sock.sendall((json.dumps({"secret": self.secret}) + "\n").encode())
+                sock.settimeout(None)
+            except OSError:
+                time.sleep(backoff * random.uniform(0.5, 1.5))
+                backoff = min(backoff * 2, 30)
+                continue
+
+            backoff = 0.5
+            with self._send_lock:
+                self._sock = sock
+            self.connected = True
+            try:
+                for line in sock.makefile("rb"):
+                    message = json.loads(line)
+                    self.broker.deliver(message["users"], message["event"], message["data"])
+            except (OSError, ValueError):
+                pass
+            finally:
+                self.connected = False
+                with self._send_lock:
+                    self._sock = None
+                sock.close()
+
+
+class RelayPeer:
+    """One connected worker: bounded outgoing queue drained by its own writer thread
+
+    A slow worker only fills its own queue (further lines to it are dropped), so the
+    relay never blocks on one peer while fanning out to the others.
+    """
+
+    def __init__(self, wfile, queue_size):
+        self.wfile = wfile
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        threading.Thread(target=self._write, name="push-relay-peer", daemon=True).start()
+
+    def put(self, line):
+        try:
+            self.queue.put_nowait(line)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        try:
+            self.queue.put_nowait(None)
+        except queue.Full:
+            pass                 # Writer fails on the closed socket instead
+
+    def _write(self):
+        while True:
+            line = self.queue.get()
+            if line is None:
+                return
+            try:
+                self.wfile.write(line)
+                self.wfile.flush()
+            except (OSError, ValueError):
+                return
+
+
+class RelayHandler(socketserver.StreamRequestHandler):
+    """Forward every line an authenticated worker sends to all other connected workers"""
+
+    def handle(self):
+        # First line must carry the shared secret (PUSH_RELAY_SECRET), within 5 seconds
+        self.request.settimeout(5)
+        try:
+            hello = json.loads(self.rfile.readline())
+            secret = hello.get("secret") if isinstance(hello, dict) else None
+        except (OSError, ValueError):
+            return
+        if not isinstance(secret, str) or not hmac.compare_digest(secret.encode(), self.server.secret.encode()):
+            self.server.rejected += 1
+            return
+        self.request.settimeout(None)
+
+        peer = RelayPeer(self.wfile, self.server.queue_size)
+        peers = self.server.peers
+        with self.server.lock:
+            peers.add(peer)
+        try:
+            for line in self.rfile:
+                # Snapshot under the lock, enqueue outside it
+                with self.server.lock:
+                    targets = [p for p in peers if p is not peer]
+                for target in targets:
+                    target.put(line)
+        except OSError:
+            pass
+        finally:
+            with self.server.lock:
+                peers.discard(peer)
+            peer.close()
+
+
+class PushRelay(socketserver.ThreadingTCPServer):
+    """Local stand-in for a pub/sub service (e.g. Redis): fans messages out across workers"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, secret, queue_size=1000):
+        if not secret:
+            raise ValueError("push relay needs a shared secret (PUSH_RELAY_SECRET)")
+        super().__init__(address, RelayHandler)
+        self.secret = secret
+        self.queue_size = queue_size
+        self.peers = set()
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+
+def from_env():
+    """Build PushBroker from PUSH_* environment variables
+
+    PUSH_RELAY=host:port enables fan-out, with PUSH_RELAY_SECRET shared by workers and relay.
+    """
+
+    broker = PushBroker(
+        queue_size=int(os.environ.get("PUSH_QUEUE_SIZE", 100)),
+        max_subscribers=int(os.environ.get("PUSH_MAX_SUBSCRIBERS", 5000)),
+        heartbeat=float(os.environ.get("PUSH_HEARTBEAT", 15)),
+        retry_ms=int(os.environ.get("PUSH_RETRY_MS", 3000)),
+    )
+    if os.environ.get("PUSH_RELAY"):
+        if not os.environ.get("PUSH_RELAY_SECRET"):
+            raise RuntimeError("PUSH_RELAY needs PUSH_RELAY_SECRET (the relay's shared secret)")
+        broker.relay = RelayClient(broker, os.environ["PUSH_RELAY"], os.environ["PUSH_RELAY_SECRET"])
+    return broker
+
+
+# Shared instance (one per worker process)
+push_broker = from_env()
+
+
+def load_test(connections=1000, heartbeat=5.0):
+    """Open idle SSE streams against an in-process server, then time one fan-out to all of them"""
+
+    os.environ.setdefault("EXPIRY_SCHEDULER", "0")
+    os.environ["SESSION_BACKEND"] = "memory"
+    os.environ.setdefault("SECRET_KEY", "loadtest")
+    os.environ["PUSH_ENABLED"] = "1"
+    import logging
+    import shutil
+    import tempfile
+    from seed_data import empty_copy
+
+    # Importing the app migrates and reads DATABASE: use an empty scratch copy, never planit.db
+    scratch = None
+    if not os.environ.get("DATABASE"):
+        scratch = tempfile.mkdtemp(prefix="planit-loadtest-")
+        os.environ["DATABASE"] = os.path.join(scratch, "planit.db")
+        empty_copy(os.environ["DATABASE"])
+    from werkzeug.serving import make_server
+    from app import app
+    from sessions import serializer
+    # The broker the app's routes use (run as a script, this module is __main__, not push)
+    from push import push_broker as broker
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    broker.heartbeat = heartbeat
+    broker.max_subscribers = max(broker.max_subscribers, connections)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    server.request_queue_size = 1024
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_port
+
+    # One session per connection, straight into the memory store
+    store = app.session_interface.store
+    cookie = app.config.get("SESSION_COOKIE_NAME", "session")
+    sids = []
+    for i in range(connections):
+        sid = f"loadtest{i}"
+        store.set(sid, serializer.dumps({"user_id": 1_000_000 + i}), time.time() + 3600)
+        sids.append(sid)
+
+    selector = selectors.DefaultSelector()
+    start = time.perf_counter()
+    for sid in sids:
+        sock = socket.create_connection(("127.0.0.1", port))
+        sock.sendall(f"GET /api/stream HTTP/1.1\r\nHost: localhost\r\nCookie: {cookie}={sid}\r\n\r\n".encode())
+        sock.setblocking(False)
+        selector.register(sock, selectors.EVENT_READ, {"buffer": b"", "ready": False, "got": None})
+
+    def pump(until, done):
+        """Read from every socket until done() or deadline"""
+
+        while time.perf_counter() < until and not done():
+            for key, _ in selector.select(timeout=0.5):
+                try:
+                    chunk = key.fileobj.recv(65536)
+                except BlockingIOError:
+                    continue
+                state = key.data
+                state["buffer"] += chunk
+                if b"retry:" in state["buffer"]:
+                    state["ready"] = True
+                if state["got"] is None and b"event: loadtest" in state["buffer"]:
+                    state["got"] = time.perf_counter()
+                state["buffer"] = state["buffer"][-64:]
+
+    states = [key.data for key in selector.get_map().values()]
+    pump(time.perf_counter() + 60, lambda: all(s["ready"] for s in states))
+    connected = sum(s["ready"] for s in states)
+    connect_time = time.perf_counter() - start
+
+    # Idle through a heartbeat, then one message to every user
+    pump(time.perf_counter() + heartbeat * 1.5, lambda: False)
+    sent = time.perf_counter()
+    broker.publish([1_000_000 + i for i in range(connections)], "loadtest", {"sent": sent})
+    pump(sent + 30, lambda: all(s["got"] for s in states if s["ready"]))
+    latencies = sorted((s["got"] - sent) * 1000 for s in states if s["got"])
+
+    for key in list(selector.get_map().values()):
+        key.fileobj.close()
+    server.shutdown()
+    if scratch:
+        shutil.rmtree(scratch, ignore_errors=True)
+    return {
+        "connections": connections,
+        "connected": connected,
+        "connect_seconds": round(connect_time, 2),
+        "received": len(latencies),
+        "fanout_p50_ms": round(statistics.median(latencies), 1) if latencies else None,
+        "fanout_max_ms": round(latencies[-1], 1) if latencies else None,
+        "threads": threading.active_count(),
+        "broker": broker.stats(),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Push channel tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    relay = sub.add_parser("relay", help="run the local relay that fans messages out across workers")
+    relay.add_argument("--bind", default="127.0.0.1:7071")
+    load = sub.add_parser("loadtest", help="hold many idle SSE streams and time a fan-out")
+    load.add_argument("--connections", type=int, default=1000)
+    load.add_argument("--heartbeat", type=float, default=5.0)
+    args = parser.parse_args()
+
+    if args.command == "relay":
+        host, port = args.bind.rsplit(":", 1)
+        secret = os.environ.get("PUSH_RELAY_SECRET")
+        if not secret:
+            parser.error("set PUSH_RELAY_SECRET (workers send it when connecting)")
+        with PushRelay((host, int(port)), secret) as server:
+            print(f"push relay on {args.bind} (set PUSH_RELAY={args.bind} and the same PUSH_RELAY_SECRET on every worker)")
+            server.serve_forever()
+    else:
+        result = load_test(args.connections, args.heartbeat)
+        for key, value in result.items():
+            print(f"{key}: {value}")
@@ -0,0 +1,186 @@
+import argparse
+import atexit
+import json
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+
+from flask import has_request_context, request
+from metrics import sql_observers
+
+# Routes whose statements must stay index-only (checked by --check)
+HOT_ENDPOINTS = {
+    "event.dashboard",
+    "event.respond_event",
+    "event.show_response",
+    "event.schedule_event",
+    "event.create_event",
+    "auth.login",
+    "background",          # Outside a request: the system_check/scheduler expiry sweep
+}
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "query_plans.json")
+
+
+def normalize(sql):
+    """Collapse whitespace so the same statement from different call sites matches"""
+
+    return re.sub(r"\s+", " ", sql).strip()
+
+
+def flagged_steps(plan):
+    """Return the plan steps that read a whole table or sort in a temp b-tree"""
+
+    return [step for step in plan
+            if (step.startswith("SCAN ") and step != "SCAN CONSTANT ROW") or "USE TEMP B-TREE" in step]
+
+
+class PlanAnalyzer:
+    """Collect EXPLAIN QUERY PLAN, call count and time of every distinct statement per endpoint"""
+
+    def __init__(self, logger=None):
+        self.logger = logger
+        self._plans = {}       # sql -> list of plan step details (None if it can't be explained)
+        self._stats = {}       # (endpoint, sql) -> [calls, seconds]
+        self._lock = threading.Lock()
+
+    def observe(self, conn, sql, parameters, seconds):
+        """sql_observers callback: record a call, explain the statement the first time it's seen"""
+
+        sql = normalize(sql)
+        endpoint = (request.endpoint or "unmatched") if has_request_context() else "background"
+        with self._lock:
+            stats = self._stats.setdefault((endpoint, sql), [0, 0.0])
+            stats[0] += 1
+            stats[1] += seconds
+            known = sql in self._plans
+            if not known:
+                self._plans[sql] = None
+
+        if not known:
+            plan = self.explain(conn, sql, parameters)
+            with self._lock:
+                self._plans[sql] = plan
+            if plan and self.logger and flagged_steps(plan):
+                self.logger.warning("query plan: %s in %s: %s", "; ".join(flagged_steps(plan)), endpoint, sql)
+
+    def explain(self, conn, sql, parameters):
+        """Return EXPLAIN QUERY PLAN details of sql (None if it isn't a plannable statement)"""
+
+        if not re.match(r"(?i)(WITH|SELECT|INSERT|UPDATE|DELETE|REPLACE)\b", sql):
+            return None
+        try:
+            rows = conn.execute("EXPLAIN QUERY PLAN " + sql, parameters).fetchall()
+        except sqlite3.Error:
+            return None
+        return [row[3] for row in rows]
+
+    def report(self):
+        """Return one dict per (endpoint, statement), slowest cumulative time first"""
+
+        with self._lock:
+            rows = [{
+                "endpoint": endpoint,
+                "sql": sql,
+                "calls": calls,
+                "total_ms": round(seconds * 1000, 3),
+                "flagged": flagged_steps(self._plans.get(sql) or []),
+            } for (endpoint, sql), (calls, seconds) in self._stats.items()]
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+    def findings(self, endpoints=None):
+        """Return set of (endpoint, sql, step) for flagged steps (only on endpoints if given)"""
+
+        return {(row["endpoint"], row["sql"], step)
+                for row in self.report()
+                if endpoints is None or row["endpoint"] in endpoints
+                for step in row["flagged"]}
+
+
+def print_report(analyzer, flagged_only=False, file=sys.stdout):
+    """Print statements with calls, cumulative time and flagged plan steps"""
+
+    print(f"{'calls':>7}{'total ms':>11}  endpoint / statement", file=file)
+    for row in analyzer.report():
+        if flagged_only and not row["flagged"]:
+            continue
+        print(f"{row['calls']:>7}{row['total_ms']:>11.2f}  {row['endpoint']}: {row['sql'][:150]}", file=file)
+        for step in row["flagged"]:
+            print(f"{'':>20}!! {step}", file=file)
+
+
+def init_query_plans(app):
+    """Development mode: explain every statement, warn on scans, print report at exit"""
+
+    analyzer = PlanAnalyzer(app.logger)
+    sql_observers.append(analyzer.observe)
+    atexit.register(print_report, analyzer, True, sys.stderr)
+    return analyzer
+
+
+def load_baseline(path):
+    """Return accepted findings from a baseline file (empty set if missing)"""
+
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {(item["endpoint"], item["sql"], item["step"]) for item in json.load(f)}
+
+
+def save_baseline(path, findings):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([{"endpoint": e, "sql": s, "step": step} for e, s, step in sorted(findings)], f, indent=2)
+        f.write("\n")
+
+
+def run_benchmark(tier, requests, workdir):
+    """Seed tier in workdir and run the benchmark routes with an analyzer attached, return it"""
+
+    # Import late: benchmark configures the app for scratch databases
+    import benchmark
+    analyzer = PlanAnalyzer()
+    sql_observers.append(analyzer.observe)
+    try:
+        benchmark.run_tier(tier, requests, workdir)
+    finally:
+        sql_observers.remove(analyzer.observe)
+    return analyzer
+
+
+def new_findings(analyzer, baseline=DEFAULT_BASELINE):
+    """Return hot-route findings of analyzer missing from the baseline file"""
+
+    return analyzer.findings(HOT_ENDPOINTS) - load_baseline(baseline)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Explain every statement run by the benchmark routes and flag scans")
+    parser.add_argument("--tier", default="small", help="seed_data tier to run against")
+    parser.add_argument("--requests", type=int, default=20, help="requests per route")
+    parser.add_argument("--all", action="store_true", help="list every statement, not only flagged ones")
+    parser.add_argument("--check", action="store_true",
+                        help="exit 1 if a hot route has a scan missing from the baseline (also run by tests/test_query_plans.py)")
+    parser.add_argument("--update", action="store_true", help="accept current hot-route scans as the baseline")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        analyzer = run_benchmark(args.tier, args.requests, tmp)
+
+    print()
+    print_report(analyzer, flagged_only=not args.all)
+
+    hot = analyzer.findings(HOT_ENDPOINTS)
+    if args.update:
+        save_baseline(args.baseline, hot)
+        print(f"\nbaseline: {len(hot)} accepted hot-route findings written to {args.baseline}")
+    elif args.check:
+        new = new_findings(analyzer, args.baseline)
+        for endpoint, sql, step in sorted(new):
+            print(f"\nNEW SCAN on {endpoint}: {step}\n    {sql}")
+        if new:
+            sys.exit(1)
+        print("\nno new scans on hot routes")
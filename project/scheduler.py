@@ -0,0 +1,177 @@
+import heapq
+import os
+import threading
+
+from datetime import date, datetime, time, timedelta
+
+
+class ExpiryScheduler:
+    """Min-heap of invite expiry deadlines, runs a job on a background thread as each one passes"""
+
+    # Re-check at least this often (seconds) in case the system clock jumps
+    MAX_SLEEP = 3600
+
+    # Failed jobs/loads are retried after RETRY_DELAY * 2^(failures - 1), at most MAX_RETRY_DELAY
+    RETRY_DELAY = 5
+    MAX_RETRY_DELAY = 300
+
+    def __init__(self):
+        self._heap = []          # (deadline, event_id), may hold stale entries
+        self._deadlines = {}     # event_id -> current deadline (source of truth)
+        self._failures = {}      # event_id -> consecutive job failures
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pid = None
+        self.app = None
+        self.job = None
+        self.runs = 0
+        self.errors = 0
+        self.retries = 0
+
+    @property
+    def running(self):
+        """True if the worker thread belongs to this process and is alive"""
+
+        return self._pid == os.getpid() and self._thread is not None and self._thread.is_alive()
+
+    def init_app(self, app, job, loader):
+        """Start scheduler on the first request of each worker process"""
+
+        self.app = app
+        self.job = job
+
+        # Started lazily so one-off scripts importing app (system_check.py) never spawn it
+        # and pre-fork servers start it inside each worker
+        @app.before_request
+        def start_expiry_scheduler():
+            if not self.running:
+                self.start(loader)
+
+    def start(self, loader):
+        """Start the worker thread, which loads (event_id, expires_at) pairs from loader() first
+
+        The check and start happen under the lock, so concurrent first requests start
+        one thread; the load runs on that thread, not inside the request.
+        """
+
+        with self._cond:
+            if self.running:
+                return
+            self._heap = []
+            self._deadlines = {}
+            self._failures = {}
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, args=(loader,), name="expiry-scheduler", daemon=True)
+            self._thread.start()
+
+    def schedule(self, event_id, expires_at):
+        """Add or move an event's deadline (no-op if scheduler is not running)"""
+
+        if not self.running:
+            return
+        with self._cond:
+            self._push(event_id, expires_at)
+            self._cond.notify()
+
+    def _push(self, event_id, expires_at):
+        """Record deadline as midnight of expires_at (matches expires_at <= today)"""
+
+        if isinstance(expires_at, str):
+            expires_at = date.fromisoformat(expires_at)
+        self._push_deadline(event_id, datetime.combine(expires_at, time.min))
+
+    def _push_deadline(self, event_id, deadline):
+        self._deadlines[event_id] = deadline
+        heapq.heappush(self._heap, (deadline, event_id))
+
+    def _retry_delay(self, failures):
+        return min(self.RETRY_DELAY * 2 ** (failures - 1), self.MAX_RETRY_DELAY)
+
+    def _load(self, loader):
+        """Load every deadline, retrying with backoff until the db answers"""
+
+        failures = 0
+        while True:
+            try:
+                with self.app.app_context():
+                    deadlines = loader()
+                break
+            except Exception:
+                failures += 1
+                self.errors += 1
+                self.app.logger.exception("Expiry scheduler failed to load deadlines")
+                with self._cond:
+                    self._cond.wait(self._retry_delay(failures))
+
+        with self._cond:
+            for event_id, expires_at in deadlines:
+                # schedule() calls made while loading are newer than the loaded rows
+                if event_id not in self._deadlines:
+                    self._push(event_id, expires_at)
+            self._cond.notify()
+
+    def _next_due(self):
+        """Block until a deadline passes, then pop and return its event id"""
+
+        with self._cond:
+            while True:
+                # Drop entries superseded by a later schedule() call
+                while self._heap and self._deadlines.get(self._heap[0][1]) != self._heap[0][0]:
+                    heapq.heappop(self._heap)
+
+                if not self._heap:
+                    self._cond.wait(self.MAX_SLEEP)
+                    continue
+
+                deadline, event_id = self._heap[0]
+                wait = (deadline - datetime.now()).total_seconds()
+                if wait <= 0:
+                    heapq.heappop(self._heap)
+                    del self._deadlines[event_id]
+                    return event_id
+                self._cond.wait(min(wait, self.MAX_SLEEP))
+
+    def _run(self, loader):
+        """Worker loop: load deadlines, then run job for every passed deadline inside an app context"""
+
+        self._load(loader)
+        while True:
+            event_id = self._next_due()
+            try:
+                with self.app.app_context():
+                    self.job(event_id)
+                self.runs += 1
+                with self._cond:
+                    self._failures.pop(event_id, None)
+            except Exception:
+                self.errors += 1
+                self.app.logger.exception("Expiry job failed for event %s", event_id)
+                self._retry(event_id)
+
+    def _retry(self, event_id):
+        """Re-push a failed event's deadline with backoff (unless rescheduled meanwhile)"""
+
+        with self._cond:
+            failures = self._failures.get(event_id, 0) + 1
+            self._failures[event_id] = failures
+            if event_id in self._deadlines:
+                return
+            self._push_deadline(event_id, datetime.now() + timedelta(seconds=self._retry_delay(failures)))
+            self.retries += 1
+            self._cond.notify()
+
+    def stats(self):
+        """Return scheduler counters as a dict"""
+
+        with self._cond:
+            return {
+                "running": self.running,
+                "scheduled": len(self._deadlines),
+                "runs": self.runs,
+                "errors": self.errors,
+                "retries": self.retries,
+            }
+
+
+# Shared instance (one per worker process)
+expiry_scheduler = ExpiryScheduler()
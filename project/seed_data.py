@@ -0,0 +1,159 @@
+import argparse
+import os
+import random
+import sqlite3
+import time
+
+from datetime import date, datetime, timedelta
+from migrate import migrate
+
+DEFAULT_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "planit.db")
+
+# Scale tiers (roughly 10k / 100k / 1M rows in total)
+TIERS = {
+    "small": {"users": 200, "events": 500, "responses": 8, "dates": 3, "topics": 2, "ideas": 2},
+    "medium": {"users": 2000, "events": 5000, "responses": 8, "dates": 3, "topics": 2, "ideas": 2},
+    "large": {"users": 20000, "events": 40000, "responses": 8, "dates": 3, "topics": 2, "ideas": 2},
+}
+
+# Tables holding user data (lookup tables event_focuses/settings/statuses are kept)
+DATA_TABLES = ["user_events", "confirmed_activities", "activity_ideas", "activity_topics", "event_dates",
+               "event_date_tallies", "responses", "invites", "events", "users"]
+
+# Extra users with no responses, and events nobody can fill, for write benchmarks
+BENCH_USERS = 500
+HOT_EVENTS = 20
+
+
+def empty_copy(target, source=DEFAULT_SOURCE):
+    """Create target db with source's schema and lookup tables but no user data"""
+
+    if os.path.exists(target):
+        os.remove(target)
+    src = sqlite3.connect(source)
+    dst = sqlite3.connect(target)
+    try:
+        # Adapted from: Python documentation - sqlite3.Connection.backup
+        # URL: https://docs.python.org/3/library/sqlite3.html#sqlite3.Connection.backup
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
+
+    migrate(target)
+    db = sqlite3.connect(target)
+    try:
+        for table in DATA_TABLES:
+            db.execute(f"DELETE FROM {table}")
+        db.execute("DELETE FROM sqlite_sequence")
+        db.commit()
+        db.execute("VACUUM")
+    finally:
+        db.close()
+
+
+def seed(target, users, events, responses=8, dates=3, topics=2, ideas=2, seed_value=50, source=DEFAULT_SOURCE):
+    """Fill a scratch copy of planit.db with synthetic data, return row counts"""
+
+    rng = random.Random(seed_value)
+    empty_copy(target, source)
+    db = sqlite3.connect(target)
+    db.execute("PRAGMA journal_mode = WAL")
+    db.execute("PRAGMA synchronous = OFF")
+    today = date.today()
+
+    focuses = [row[0] for row in db.execute("SELECT id FROM event_focuses")]
+    settings = [row[0] for row in db.execute("SELECT id FROM event_settings")]
+
+    # Users (plus idle bench users used by the write benchmarks)
+    db.executemany("INSERT INTO users (id, username, hash) VALUES (?, ?, NULL)",
+                   ((i, f"user_{i}") for i in range(1, users + BENCH_USERS + 1)))
+
+    rows = {"users": users + BENCH_USERS}
+    invite_id = response_id = topic_id = 0
+    event_rows, invite_rows, response_rows, date_rows, topic_rows, idea_rows = [], [], [], [], [], []
+
+    for event_id in range(1, events + HOT_EVENTS + 1):
+        hot = event_id > events
+        creator = rng.randint(1, users)
+        start = today + timedelta(days=rng.randint(1, 10))
+        end = start + timedelta(days=13)
+        created = datetime.now().replace(microsecond=0) - timedelta(days=rng.randint(0, 365 * 3), seconds=rng.randint(0, 86399))
+
+        # Ongoing / confirmed / cancelled mix; hot events stay ongoing for ever
+        status = 0 if hot else rng.choices([0, 1, 2], weights=[6, 3, 1])[0]
+        chosen = (start + timedelta(days=rng.randint(0, 13))).isoformat() if status == 1 else None
+        pass_limit = 10 ** 6 if hot else rng.randint(2, responses)
+        expected = 10 ** 6 if hot else responses + rng.randint(0, 4)
+        expires = chosen or (today + timedelta(days=rng.randint(-3, 7))).isoformat()
+
+        event_rows.append((event_id, creator, rng.choice(focuses), rng.choice(settings), start.isoformat(),
+                           end.isoformat(), pass_limit, expected, status, chosen, created.isoformat(" ")))
+        invite_id += 1
+        invite_rows.append((invite_id, event_id, creator, f"tok{event_id:08d}", expires))
+
+        # Creator auto-confirm, then random invitees
+        respondents = [creator] + [u for u in rng.sample(range(1, users + 1), min(responses, users)) if u != creator]
+        for user_id in respondents[:responses]:
+            res = 1 if user_id == creator else rng.choice([None, 0, 1, 1])
+            response_id += 1
+            response_rows.append((response_id, invite_id, user_id, res))
+            if res == 1 and user_id != creator:
+                for day in rng.sample(range(14), dates):
+                    date_rows.append((event_id, user_id, (start + timedelta(days=day)).isoformat()))
+
+        for t in range(topics):
+            topic_id += 1
+            topic_rows.append((topic_id, event_id, f"Activity {t + 1}"))
+            for i in range(ideas):
+                idea_rows.append((topic_id, rng.choice(respondents), f"Idea {i + 1}"))
+
+    db.executemany("""INSERT INTO events (id, creator_id, focus_id, setting_id, start_date, end_date,
+                                          pass_limit, expected_total, status_id, chosen_date, created_at)
+                      VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""", event_rows)
+    db.executemany("INSERT INTO invites (id, event_id, creator_id, token, expires_at) VALUES (?, ?, ?, ?, ?)", invite_rows)
+    db.executemany("INSERT INTO responses (id, invite_id, user_id, res) VALUES (?, ?, ?, ?)", response_rows)
+    db.executemany("INSERT INTO event_dates (event_id, user_id, date) VALUES (?, ?, ?)", date_rows)
+    db.executemany("INSERT INTO activity_topics (id, event_id, topic) VALUES (?, ?, ?)", topic_rows)
+    db.executemany("INSERT INTO activity_ideas (topic_id, user_id, idea) VALUES (?, ?, ?)", idea_rows)
+    db.commit()
+    db.execute("ANALYZE")
+    db.close()
+
+    rows.update({"events": len(event_rows), "invites": len(invite_rows), "responses": len(response_rows),
+                 "event_dates": len(date_rows), "activity_topics": len(topic_rows), "activity_ideas": len(idea_rows)})
+    rows["total"] = sum(rows.values())
+    return rows
+
+
+def seed_tier(target, tier, seed_value=50, source=DEFAULT_SOURCE):
+    """Seed target with one of the TIERS sizes"""
+
+    return seed(target, seed_value=seed_value, source=source, **TIERS[tier])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fill a scratch copy of planit.db with synthetic data")
+    parser.add_argument("target", help="scratch database to create (overwritten)")
+    parser.add_argument("--tier", choices=sorted(TIERS), help="preset size (overrides counts below)")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--responses", type=int, default=8, help="responses per event")
+    parser.add_argument("--dates", type=int, default=3, help="dates picked per confirm")
+    parser.add_argument("--topics", type=int, default=2, help="activity topics per event")
+    parser.add_argument("--ideas", type=int, default=2, help="ideas per topic")
+    parser.add_argument("--seed", type=int, default=50, help="random seed")
+    args = parser.parse_args()
+
+    if os.path.abspath(args.target) == os.path.abspath(DEFAULT_SOURCE):
+        parser.error("refusing to overwrite planit.db, pick a scratch file")
+
+    start = time.perf_counter()
+    if args.tier:
+        counts = seed_tier(args.target, args.tier, args.seed)
+    else:
+        counts = seed(args.target, args.users, args.events, args.responses, args.dates,
+                      args.topics, args.ideas, args.seed)
+    elapsed = time.perf_counter() - start
+    print(", ".join(f"{table}: {count}" for table, count in counts.items()))
+    print(f"seeded {args.target} in {elapsed:.1f}s")
@@ -0,0 +1,269 @@
+import argparse
+import os
+import secrets
+import sqlite3
+import tempfile
+import threading
+import time
+
+from collections import OrderedDict
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+# Same serializer Flask uses for cookie sessions (handles tuples from flash(), bytes, dates)
+serializer = TaggedJSONSerializer()
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    """Session dict stored server side under a random id"""
+
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+
+        CallbackDict.__init__(self, initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+
+
+class SqliteSessionStore:
+    """Sessions in their own sqlite file (keeps session writes off planit.db's lock)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        db = sqlite3.connect(path)
+        try:
+            db.execute("PRAGMA journal_mode = WAL")
+            db.execute("""CREATE TABLE IF NOT EXISTS sessions (
+                              id TEXT PRIMARY KEY,
+                              data TEXT NOT NULL,
+                              expires_at REAL NOT NULL
+                          )""")
+            db.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at)")
+            db.commit()
+        finally:
+            db.close()
+
+    def _db(self):
+        """One autocommit connection per thread, reused across requests"""
+
+        db = getattr(self._local, "db", None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(self.path, isolation_level=None)
+            db.execute("PRAGMA busy_timeout = 5000")
+            db.execute("PRAGMA synchronous = NORMAL")
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    def get(self, sid, now):
+        """Return (data, expires_at) if session exists and is live, else None"""
+
+        row = self._db().execute("SELECT data, expires_at FROM sessions WHERE id = ? AND expires_at > ?",
+                                 (sid, now)).fetchone()
+        return row
+
+    def set(self, sid, data, expires_at):
+        self._db().execute("INSERT OR REPLACE INTO sessions (id, data, expires_at) VALUES (?, ?, ?)",
+                           (sid, data, expires_at))
+
+    def touch(self, sid, expires_at):
+        self._db().execute("UPDATE sessions SET expires_at = ? WHERE id = ?", (expires_at, sid))
+
+    def delete(self, sid):
+        self._db().execute("DELETE FROM sessions WHERE id = ?", (sid,))
+
+    def sweep(self, now):
+        """Delete expired sessions, return number removed"""
+
+        return self._db().execute("DELETE FROM sessions WHERE expires_at <= ?", (now,)).rowcount
+
+
+class MemorySessionStore:
+    """Sessions in an LRU dict (per process: use with a single worker only)"""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, sid, now):
+        with self._lock:
+            entry = self._data.get(sid)
+            if entry is None or entry[1] <= now:
+                return None
+            self._data.move_to_end(sid)
+            return entry
+
+    def set(self, sid, data, expires_at):
+        with self._lock:
+            self._data[sid] = (data, expires_at)
+            self._data.move_to_end(sid)
+            # Evict least recently used
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def touch(self, sid, expires_at):
+        with self._lock:
+            if sid in self._data:
+                self._data[sid] = (self._data[sid][0], expires_at)
+
+    def delete(self, sid):
+        with self._lock:
+            self._data.pop(sid, None)
+
+    def sweep(self, now):
+        with self._lock:
+            expired = [sid for sid, (_, expires_at) in self._data.items() if expires_at <= now]
+            for sid in expired:
+                del self._data[sid]
+            return len(expired)
+
+
+class StoreSessionInterface(SessionInterface):
+    """Flask session interface over a SqliteSessionStore/MemorySessionStore with TTL"""
+
+    session_class = ServerSession
+
+    def __init__(self, store, ttl, sweep_interval=600):
+        self.store = store
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self._sweeper = None
+        self._sweeper_pid = None
+        self.swept = 0
+
+    def _start_sweeper(self):
+        """Start background sweeper once per worker process"""
+
+        if self._sweeper_pid == os.getpid():
+            return
+        self._sweeper_pid = os.getpid()
+
+        def sweep_forever():
+            while True:
+                time.sleep(self.sweep_interval)
+                try:
+                    self.swept += self.store.sweep(time.time())
+                except sqlite3.Error:
+                    pass  # Try again next round
+
+        self._sweeper = threading.Thread(target=sweep_forever, name="session-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def open_session(self, app, request):
+        self._start_sweeper()
+
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            row = self.store.get(sid, time.time())
+            if row is not None:
+                session = self.session_class(serializer.loads(row[0]), sid=sid)
+                session.expires_at = row[1]
+                return session
+        # New (or expired/unknown) session gets a fresh unguessable id
+        return self.session_class(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        # Emptied session: drop it server side and in the browser
+        if not session:
+            if session.modified and not session.new:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        now = time.time()
+        expires_at = now + self.ttl
+        if session.modified or session.new:
+            self.store.set(session.sid, serializer.dumps(dict(session)), expires_at)
+        elif getattr(session, "expires_at", 0) - now < self.ttl / 2:
+            # Sliding expiry, but only write once per half TTL instead of every request
+            self.store.touch(session.sid, expires_at)
+
+        if session.new or session.modified:
+            response.set_cookie(
+                name,
+                session.sid,
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=domain,
+                path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app),
+            )
+
+
+def init_sessions(app, backend="sqlite"):
+    """Install server-side session backend ("sqlite" or "memory") on app"""
+
+    ttl = app.config.get("SESSION_TTL", 7 * 24 * 3600)
+    interval = app.config.get("SESSION_SWEEP_INTERVAL", 600)
+    if backend == "memory":
+        store = MemorySessionStore(app.config.get("SESSION_MAX_ENTRIES", 10000))
+    elif backend == "sqlite":
+        store = SqliteSessionStore(app.config.get("SESSION_DB") or os.path.join(app.root_path, "sessions.db"))
+    else:
+        raise ValueError(f"Unknown session backend: {backend}")
+    app.session_interface = StoreSessionInterface(store, ttl, interval)
+    return app.session_interface
+
+
+def benchmark(requests=2000):
+    """Compare per-request session overhead of filesystem, sqlite and memory backends"""
+
+    from flask import Flask, session
+    from flask_session import Session
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in ("filesystem", "sqlite", "memory"):
+            app = Flask(__name__)
+            app.secret_key = "benchmark"
+            app.config["SESSION_PERMANENT"] = False
+            if backend == "filesystem":
+                app.config["SESSION_TYPE"] = "filesystem"
+                app.config["SESSION_FILE_DIR"] = os.path.join(tmp, "flask_session")
+                Session(app)
+            else:
+                app.config["SESSION_DB"] = os.path.join(tmp, "sessions.db")
+                init_sessions(app, backend)
+
+            # Typical page view reads the user id, a form POST flashes a message
+            @app.route("/")
+            def page():
+                return str(session.get("user_id"))
+
+            @app.route("/flash")
+            def flash_page():
+                session["user_id"] = 1
+                session["user_photo"] = "/static/uploads/default.png"
+                session["_flashes"] = [("success", "Changes saved!")]
+                return "ok"
+
+            client = app.test_client()
+            client.get("/flash")
+            for label, url in (("read", "/"), ("write", "/flash")):
+                start = time.perf_counter()
+                for _ in range(requests):
+                    client.get(url)
+                elapsed = time.perf_counter() - start
+                results[(backend, label)] = elapsed / requests * 1e6
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark session backends (per-request overhead)")
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    results = benchmark(args.requests)
+    print(f"{'backend':<12}{'read (us/req)':>16}{'write (us/req)':>16}")
+    for backend in ("filesystem", "sqlite", "memory"):
+        print(f"{backend:<12}{results[(backend, 'read')]:>16.1f}{results[(backend, 'write')]:>16.1f}")
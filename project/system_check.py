@@ -1,27 +1,54 @@
+import argparse
+import time
+
 from datetime import datetime, date
 from app import app
-from helpers import get_db, close_db, removal_check
+from helpers import get_db, close_db, removal_sweep, reconcile_counters
 
-def remove_events():
+def remove_events(batch_size=500, verbose=False):
+    """Confirm/delete every expired event in batches, return sweep stats"""
 
     db = get_db()
     cur = db.cursor()
-    # Get all events and their expiry dates
-    cur.execute("""
-        SELECT e.id AS event_id, i.expires_at
-        FROM events e
-        JOIN invites i ON e.id = i.event_id
-    """)
-    rows = cur.fetchall()
-
-    # Loop through events and check expiry
-    for row in rows:
-        expires_at = date.fromisoformat(row["expires_at"])
-        if expires_at <= date.today():
-            removal_check(row["event_id"])
+    start = time.perf_counter()
+
+    # Get expired events only (range scan on idx_invites_expires). No DISTINCT/ORDER BY:
+    # either makes the planner walk idx_invites_event instead, so de-duplicate here;
+    # removal_sweep skips ids whose event is gone
+    cur.execute("SELECT event_id FROM invites WHERE expires_at <= ?", (date.today().isoformat(),))
+    event_ids = sorted({row["event_id"] for row in cur.fetchall()})
+
+    # Process in chunks so the write lock is released between batches
+    confirmed = deleted = 0
+    for i in range(0, len(event_ids), batch_size):
+        batch_confirmed, batch_deleted = removal_sweep(event_ids[i:i + batch_size])
+        confirmed += batch_confirmed
+        deleted += batch_deleted
 
     close_db()
 
+    elapsed = time.perf_counter() - start
+    stats = {
+        "processed": confirmed + deleted,
+        "confirmed": confirmed,
+        "deleted": deleted,
+        "seconds": round(elapsed, 3),
+        "events_per_sec": round((confirmed + deleted) / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+    if verbose:
+        print("processed {processed} event(s): {confirmed} confirmed, {deleted} deleted "
+              "in {seconds}s ({events_per_sec} events/s)".format(**stats))
+    return stats
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scheduled maintenance for planit.db")
+    parser.add_argument("--reconcile", action="store_true", help="rebuild RSVP counters from responses")
+    parser.add_argument("--batch-size", type=int, default=500, help="expired events per transaction")
+    args = parser.parse_args()
+
     with app.app_context():
-        remove_events()
+        if args.reconcile:
+            print(f"reconciled {reconcile_counters()} event(s)")
+            close_db()
+        else:
+            remove_events(batch_size=args.batch_size, verbose=True)
@@ -0,0 +1,36 @@
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+# The app reads these at import: scratch database, no background jobs, sessions in memory
+SCRATCH_DIR = tempfile.mkdtemp(prefix="planit-tests-")
+os.environ["DATABASE"] = os.path.join(SCRATCH_DIR, "planit.db")
+os.environ["EXPIRY_SCHEDULER"] = "0"
+os.environ["SESSION_BACKEND"] = "memory"
+os.environ.setdefault("SECRET_KEY", "tests")
+
+from seed_data import empty_copy
+
+empty_copy(os.environ["DATABASE"])
+
+
+@pytest.fixture(scope="session")
+def app():
+    """Flask app on an empty scratch copy of planit.db"""
+
+    from app import app
+
+    app.config["TESTING"] = True
+    yield app
+    shutil.rmtree(SCRATCH_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,43 @@
+from datetime import date, timedelta
+
+from helpers import get_db
+from lookups import lookups
+
+
+def add_user(app, username):
+    """Insert a user straight into the scratch db, return its id"""
+
+    with app.app_context():
+        db = get_db()
+        cur = db.execute("INSERT INTO users (username) VALUES (?)", (username,))
+        db.commit()
+        return cur.lastrowid
+
+
+def stored_photo(app, user_id):
+    with app.app_context():
+        return get_db().execute("SELECT photo FROM users WHERE id = ?", (user_id,)).fetchone()[0]
+
+
+def login(client, user_id):
+    with client.session_transaction() as session:
+        session["user_id"] = user_id
+        session["user_photo"] = "/static/uploads/default.png"
+
+
+def create_events(client, count, min_participants=2, max_participants=3):
+    """Create count ongoing events for the logged in user through the bulk API, return their tokens"""
+
+    today = date.today()
+    spec = {
+        "focus": lookups.labels("focus")[0],
+        "setting": lookups.labels("setting")[0],
+        "start_date": (today + timedelta(days=1)).isoformat(),
+        "end_date": (today + timedelta(days=5)).isoformat(),
+        "topics": [{"topic": "Lunch", "ideas": ["Pizza"]}],
+        "min_participants": min_participants,
+        "max_participants": max_participants,
+    }
+    response = client.post("/api/events/bulk", json=[spec] * count)
+    assert response.status_code == 201
+    return [event["invite_link"].rsplit("/", 1)[1] for event in response.get_json()["events"]]
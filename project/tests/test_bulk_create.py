@@ -0,0 +1,52 @@
+from datetime import date, timedelta
+
+from helpers import get_db
+from lookups import lookups
+from support import add_user, create_events, login
+
+
+def event_count(app):
+    with app.app_context():
+        return get_db().execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+
+def valid_spec():
+    today = date.today()
+    return {
+        "focus": lookups.labels("focus")[0],
+        "setting": lookups.labels("setting")[0],
+        "start_date": (today + timedelta(days=1)).isoformat(),
+        "end_date": (today + timedelta(days=5)).isoformat(),
+        "topics": [{"topic": "Lunch", "ideas": ["Pizza"]}],
+        "min_participants": 2,
+        "max_participants": 3,
+    }
+
+
+def test_one_invalid_spec_rejects_whole_batch(app, client):
+    """Errors are reported per index and nothing is written, not even the valid specs"""
+
+    login(client, add_user(app, "bulk_user"))
+    invalid = dict(valid_spec(), focus="nope", min_participants=3, max_participants=2)
+    before = event_count(app)
+
+    response = client.post("/api/events/bulk", json=[valid_spec(), invalid, valid_spec()])
+    assert response.status_code == 400
+    errors = response.get_json()["errors"]
+    assert [error["index"] for error in errors] == [1]
+    assert {"focus", "max"} <= set(errors[0]["errors"])
+    assert event_count(app) == before
+
+
+def test_valid_batch_creates_every_event(app, client):
+    login(client, add_user(app, "bulk_user_ok"))
+    before = event_count(app)
+    tokens = create_events(client, 3)
+    assert len(set(tokens)) == 3
+    assert event_count(app) == before + 3
+
+
+def test_bulk_requires_a_list(app, client):
+    login(client, add_user(app, "bulk_user_empty"))
+    assert client.post("/api/events/bulk", json=[]).status_code == 400
+    assert client.post("/api/events/bulk", json={"events": "x"}).status_code == 400
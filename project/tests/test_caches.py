@@ -0,0 +1,84 @@
+import io
+
+from datetime import date, timedelta
+
+from PIL import Image
+
+from page_cache import plan_cache
+from photos import thumb_url
+from support import add_user, create_events, login, stored_photo
+
+
+def user_client(app, username):
+    client = app.test_client()
+    user_id = add_user(app, username)
+    login(client, user_id)
+    return user_id, client
+
+
+def confirm(client, token):
+    day = (date.today() + timedelta(days=2)).isoformat()
+    return client.post(f"/rsvp/{token}", data={"confirm": "1", "date": [day]})
+
+
+def confirmed_event(app, prefix):
+    """Event for two confirmed by its creator and one guest, return (token, guest id, guest client)"""
+
+    _, creator = user_client(app, f"{prefix}_creator")
+    token, = create_events(creator, 1, min_participants=2, max_participants=2)
+    guest_id, guest = user_client(app, f"{prefix}_guest")
+    assert guest.get(f"/rsvp/{token}").status_code == 200
+    confirm(guest, token)
+    return token, guest_id, guest
+
+
+def test_rsvp_confirmation_drops_cached_invite(app):
+    """Once the last RSVP confirms the event, the cached invite no longer shows the form"""
+
+    _, creator = user_client(app, "cache_rsvp_creator")
+    token, = create_events(creator, 1, min_participants=2, max_participants=2)
+    _, guest = user_client(app, "cache_rsvp_guest")
+    _, late = user_client(app, "cache_rsvp_late")
+    assert guest.get(f"/rsvp/{token}").status_code == 200
+    assert late.get(f"/rsvp/{token}").status_code == 200   # Invite now cached as ongoing
+
+    confirm(guest, token)
+    response = late.get(f"/rsvp/{token}")
+    assert response.status_code == 302
+    assert response.headers["Location"].endswith(f"/scheduled/{token}")
+
+
+def test_creator_rename_shows_on_cached_invite(app):
+    creator_id, creator = user_client(app, "cache_rename_before")
+    token, = create_events(creator, 1)
+    _, guest = user_client(app, "cache_rename_guest")
+    assert "cache_rename_before" in guest.get(f"/rsvp/{token}").get_data(as_text=True)
+
+    creator.post("/account-details", data={"username": "cache_rename_after"})
+    page = guest.get(f"/rsvp/{token}").get_data(as_text=True)
+    assert "cache_rename_after" in page and "cache_rename_before" not in page
+
+
+def test_attendee_rename_and_photo_refresh_cached_plan(app, tmp_path, monkeypatch):
+    """The rendered plan is cached, but an attendee's new name or photo shows up at once"""
+
+    token, guest_id, guest = confirmed_event(app, "cache_plan")
+    page = guest.get(f"/scheduled/{token}").get_data(as_text=True)
+    assert "cache_plan_guest" in page
+    hits = plan_cache.stats()["hits"]
+    assert "cache_plan_guest" in guest.get(f"/scheduled/{token}").get_data(as_text=True)
+    assert plan_cache.stats()["hits"] == hits + 1
+
+    guest.post("/account-details", data={"username": "cache_plan_renamed"})
+    page = guest.get(f"/scheduled/{token}").get_data(as_text=True)
+    assert "cache_plan_renamed" in page and "cache_plan_guest" not in page
+
+    app.jinja_loader
+    monkeypatch.setattr(app, "root_path", str(tmp_path))
+    image = io.BytesIO()
+    Image.new("RGB", (64, 64), "navy").save(image, "PNG")
+    guest.post("/account-details", data={"upload": (io.BytesIO(image.getvalue()), "me.png")},
+               content_type="multipart/form-data")
+    photo = stored_photo(app, guest_id)
+    assert photo.startswith("/static/uploads/") and photo != "/static/uploads/default.png"
+    assert thumb_url(photo) in guest.get(f"/scheduled/{token}").get_data(as_text=True)
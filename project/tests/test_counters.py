@@ -0,0 +1,36 @@
+from helpers import get_db, reconcile_counters
+from support import add_user, create_events, login
+
+
+def stored_counts(app, token):
+    with app.app_context():
+        row = get_db().execute("""SELECT e.id, e.confirm_count, e.decline_count, e.pending_count
+                                  FROM events e JOIN invites i ON i.event_id = e.id
+                                  WHERE i.token = ?""", (token,)).fetchone()
+        return row[0], tuple(row[1:])
+
+
+def test_counters_follow_responses(app):
+    """Trigger-maintained counters: pending is invitees yet to answer, matching a full recount"""
+
+    creator = app.test_client()
+    login(creator, add_user(app, "counters_creator"))
+    token, = create_events(creator, 1, min_participants=3, max_participants=4)
+    event_id, counts = stored_counts(app, token)
+    assert counts == (1, 0, 3)                       # Creator auto-confirmed
+
+    guest = app.test_client()
+    login(guest, add_user(app, "counters_guest"))
+    assert guest.get(f"/rsvp/{token}").status_code == 200
+    assert stored_counts(app, token)[1] == (1, 0, 3)  # Opened the link, hasn't answered
+
+    guest.post(f"/rsvp/{token}", data={"decline": "1"})
+    assert stored_counts(app, token)[1] == (1, 1, 2)
+
+    status = creator.get(f"/api/events/{token}/status").get_json()
+    assert (status["confirmed"], status["declined"], status["pending"]) == (1, 1, 2)
+    assert status["status"] == "ongoing"
+
+    with app.app_context():
+        reconcile_counters(event_id)
+    assert stored_counts(app, token)[1] == (1, 1, 2)
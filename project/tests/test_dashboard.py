@@ -0,0 +1,62 @@
+import re
+
+from lookups import lookups
+from metrics import sql_observers
+from support import add_user, create_events, login
+
+N = 5
+
+
+def dashboard_statements(client):
+    """Return (SQL statements run, event cards shown) for one dashboard GET"""
+
+    # Warm-up request so one-off loads (lookup cache, pools) aren't counted
+    assert client.get("/").status_code == 200
+
+    statements = []
+    observer = lambda conn, sql, parameters, seconds: statements.append(sql)
+    sql_observers.append(observer)
+    try:
+        response = client.get("/")
+    finally:
+        sql_observers.remove(observer)
+    assert response.status_code == 200
+    return len(statements), len(re.findall(r'data-event-id="\d+"', response.get_data(as_text=True)))
+
+
+def test_dashboard_queries_independent_of_event_count(app, client):
+    """Dashboard runs the same number of statements for N and 10N events"""
+
+    app.config["DASHBOARD_PAGE_SIZE"] = 20 * N   # Every event on one page
+    lookups.check_interval = float("inf")        # No lookup version checks mid-test
+    login(client, add_user(app, "dashboard_test_user"))
+
+    create_events(client, N)
+    small, cards = dashboard_statements(client)
+    assert cards == N
+
+    create_events(client, 9 * N)
+    large, cards = dashboard_statements(client)
+    assert cards == 10 * N
+
+    assert small == large
+
+
+def test_keyset_pages_cover_every_event_once(app, client, monkeypatch):
+    """Following "Older plans" links visits each event exactly once, newest first"""
+
+    monkeypatch.setitem(app.config, "DASHBOARD_PAGE_SIZE", 2)
+    login(client, add_user(app, "dashboard_pages_user"))
+    create_events(client, 5)
+
+    seen, url = [], "/"
+    while url:
+        page = client.get(url).get_data(as_text=True)
+        ids = [int(i) for i in re.findall(r'data-event-id="(\d+)"', page)]
+        assert 0 < len(ids) <= 2
+        seen.extend(ids)
+        after = re.search(r'after=([^"&]+)', page)
+        url = f"/?after={after.group(1)}" if after else None
+
+    assert len(seen) == 5 and len(set(seen)) == 5
+    assert seen == sorted(seen, reverse=True)
@@ -0,0 +1,25 @@
+import builtins
+
+from http_cache import IMMUTABLE
+
+
+def test_fingerprinted_static_file_is_immutable(app, client):
+    url = app.jinja_env.globals["static_url"]("styles.css")
+    assert "?v=" in url
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == IMMUTABLE
+
+
+def test_static_path_outside_folder_is_not_read(client, monkeypatch):
+    """A traversal attempt is a plain 404: nothing outside static/ is opened or hashed"""
+
+    opened = []
+    real_open = builtins.open
+    monkeypatch.setattr(builtins, "open", lambda file, *args, **kwargs: opened.append(file) or real_open(file, *args, **kwargs))
+
+    response = client.get("/static/..%2F..%2F..%2F..%2Fetc%2Fhostname?v=abc")
+    assert response.status_code == 404
+    assert response.headers["Cache-Control"] != IMMUTABLE
+    assert not any("hostname" in str(path) for path in opened)
@@ -0,0 +1,195 @@
+import json
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from joserfc import jwt
+from joserfc.jwk import RSAKey
+
+import oidc_cache
+
+from auth import oauth
+from oidc_cache import DocumentCache
+
+METADATA_PATH = "/.well-known/openid-configuration"
+
+
+class StubIdP:
+    """Local identity provider: discovery, JWKS and token endpoints, counting hits"""
+
+    def __init__(self):
+        self.keys = [self.new_key("stub-1")]
+        self.hits = {METADATA_PATH: 0, "/jwks": 0, "/token": 0}
+        self.nonces = {}             # authorization code -> nonce
+        self.down = False
+        self.max_age = 300
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler())
+        self.issuer = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @staticmethod
+    def new_key(kid):
+        return RSAKey.generate_key(2048, parameters={"kid": kid, "use": "sig", "alg": "RS256"})
+
+    def rotate(self, kid):
+        """Sign with a new key from now on (the JWKS lists both)"""
+
+        self.keys.insert(0, self.new_key(kid))
+
+    def handler(self):
+        idp = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def reply(self, document):
+                body = json.dumps(document).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Cache-Control", f"public, max-age={idp.max_age}")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                path = urlparse(self.path).path
+                if idp.down or path not in idp.hits:
+                    self.send_error(503)
+                    return
+                idp.hits[path] += 1
+                if path == "/jwks":
+                    self.reply({"keys": [key.as_dict(private=False) for key in idp.keys]})
+                else:
+                    self.reply({
+                        "issuer": idp.issuer,
+                        "authorization_endpoint": idp.issuer + "/authorize",
+                        "token_endpoint": idp.issuer + "/token",
+                        "jwks_uri": idp.issuer + "/jwks",
+                        "id_token_signing_alg_values_supported": ["RS256"],
+                    })
+
+            def do_POST(self):
+                form = parse_qs(self.rfile.read(int(self.headers["Content-Length"])).decode())
+                idp.hits["/token"] += 1
+                now = int(time.time())
+                key = idp.keys[0]
+                id_token = jwt.encode({"alg": "RS256", "kid": key.kid}, {
+                    "iss": idp.issuer, "aud": "stub-client", "sub": "stub-user", "iat": now, "exp": now + 300,
+                    "nonce": idp.nonces[form["code"][0]], "email": "stub.user@example.test",
+                    "name": "Stub User", "picture": "/static/uploads/default.png",
+                }, key)
+                self.reply({"access_token": "stub", "token_type": "Bearer", "expires_in": 300, "id_token": id_token})
+
+        return Handler
+
+
+@pytest.fixture
+def idp():
+    server = StubIdP()
+    yield server
+    server.server.shutdown()
+
+
+@pytest.fixture
+def cache(app, idp, tmp_path, monkeypatch):
+    """Point the registered Google client at the stub, with an empty document cache"""
+
+    documents = DocumentCache(directory=str(tmp_path))
+    monkeypatch.setattr(oidc_cache, "oidc_documents", documents)
+    google = oauth.google
+    monkeypatch.setattr(google, "client_id", "stub-client")
+    monkeypatch.setattr(google, "client_secret", "stub-secret")
+    monkeypatch.setattr(google, "_server_metadata_url", idp.issuer + METADATA_PATH)
+    monkeypatch.setattr(google, "server_metadata", {})
+    return documents
+
+
+def google_login(app, idp):
+    """Run /login/google and its callback against the stub, True if the user ends up logged in"""
+
+    client = app.test_client()
+    location = client.get("/login/google").headers["Location"]
+    query = parse_qs(urlparse(location).query)
+    code = f"code-{len(idp.nonces)}"
+    idp.nonces[code] = query["nonce"][0]
+    response = client.get(f"/login/google/callback?code={code}&state={query['state'][0]}")
+    with client.session_transaction() as session:
+        return response.status_code == 302 and "user_id" in session
+
+
+def age(cache, seconds):
+    """Pretend every cached copy (memory and disk) was fetched seconds earlier"""
+
+    for url, (fetched_at, max_age, document) in list(cache._docs.items()):
+        cache._docs[url] = entry = (fetched_at - seconds, max_age, document)
+        cache._store_disk(url, entry)
+        cache._attempts[url] = cache._attempts.get(url, 0) - seconds
+
+
+def test_documents_fetched_once(app, idp, cache):
+    """Discovery and JWKS are fetched by the first login only"""
+
+    assert google_login(app, idp)
+    assert google_login(app, idp)
+    assert google_login(app, idp)
+    assert idp.hits[METADATA_PATH] == 1 and idp.hits["/jwks"] == 1
+    assert idp.hits["/token"] == 3
+
+
+def test_fresh_worker_reads_disk_copy(app, idp, cache, tmp_path):
+    assert google_login(app, idp)
+
+    worker = DocumentCache(directory=str(tmp_path))
+    worker.get(idp.issuer + METADATA_PATH)
+    assert worker.disk_loads == 1 and worker.fetches == 0
+
+
+def test_stale_copy_served_and_revalidated(app, idp, cache):
+    assert google_login(app, idp)
+    age(cache, idp.max_age + 1)
+
+    assert cache.get(idp.issuer + METADATA_PATH)["issuer"] == idp.issuer
+    assert cache.stale_hits == 1
+    deadline = time.time() + 5
+    while idp.hits[METADATA_PATH] < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    assert idp.hits[METADATA_PATH] == 2
+
+
+def test_login_works_while_idp_down(app, idp, cache):
+    """Expired copies keep logins working during an outage, with one fetch attempt each"""
+
+    assert google_login(app, idp)
+    age(cache, idp.max_age + cache.stale_ttl + 1)
+    idp.down = True
+    errors = cache.errors
+    assert google_login(app, idp)
+    assert google_login(app, idp)
+    assert cache.errors == errors + 2
+
+
+def test_key_rotation_refetches_jwks(app, idp, cache):
+    """A token signed with a new kid forces one JWKS refetch and the login succeeds"""
+
+    assert google_login(app, idp)
+    age(cache, cache.retry_interval)   # Last JWKS fetch is past the retry interval
+    idp.rotate("stub-2")
+
+    assert google_login(app, idp)
+    assert idp.hits["/jwks"] == 2
+    assert google_login(app, idp)
+    assert idp.hits["/jwks"] == 2
+
+
+def test_forced_jwks_refetch_rate_limited(app, idp, cache):
+    assert google_login(app, idp)
+    cache._attempts.pop(idp.issuer + "/jwks", None)
+
+    cache.get(idp.issuer + "/jwks", force=True)
+    cache.get(idp.issuer + "/jwks", force=True)
+    assert idp.hits["/jwks"] == 2
@@ -0,0 +1,80 @@
+import io
+import os
+
+from PIL import Image
+
+from photos import photo_files
+from support import add_user, login, stored_photo
+
+
+def png_bytes(color):
+    out = io.BytesIO()
+    Image.new("RGB", (300, 200), color).save(out, "PNG")
+    return out.getvalue()
+
+
+def upload(client, data):
+    return client.post("/account-details", data={"upload": (io.BytesIO(data), "photo.png")},
+                       content_type="multipart/form-data")
+
+
+def test_shared_photo_files_deleted_with_last_reference(app, tmp_path, monkeypatch):
+    """Identical uploads share files, which go only when the last user drops them"""
+
+    app.jinja_loader   # Templates keep loading from the project while photos go to tmp_path
+    monkeypatch.setattr(app, "root_path", str(tmp_path))
+
+    clients = {}
+    for name in ("photo_user_a", "photo_user_b"):
+        user_id = add_user(app, name)
+        clients[user_id] = app.test_client()
+        login(clients[user_id], user_id)
+    (a, client_a), (b, client_b) = clients.items()
+
+    data = png_bytes("orange")
+    assert upload(client_a, data).status_code == 302
+    assert upload(client_b, data).status_code == 302
+    web_path = stored_photo(app, a)
+    assert stored_photo(app, b) == web_path
+    files = [os.path.join(tmp_path, path.lstrip("/")) for path in photo_files(web_path)]
+    assert len(files) == 2 and all(os.path.isfile(path) for path in files)
+
+    # Still referenced by b
+    client_a.post("/account-details", data={"remove": "1"})
+    assert stored_photo(app, a) == "/static/uploads/default.png"
+    assert all(os.path.isfile(path) for path in files)
+
+    # b moves to a different photo: the shared files go
+    assert upload(client_b, png_bytes("teal")).status_code == 302
+    assert stored_photo(app, b) != web_path
+    assert not any(os.path.exists(path) for path in files)
+
+
+def test_files_restored_if_removed_before_reference_commits(app, tmp_path, monkeypatch):
+    """Files are written outside the lock; a remove_photo racing in between can't orphan the reference"""
+
+    import acc
+    from photos import store_photo
+
+    app.jinja_loader
+    monkeypatch.setattr(app, "root_path", str(tmp_path))
+    calls = []
+
+    def racing_store(root, digest, renders):
+        web_path = store_photo(root, digest, renders)
+        if not calls:
+            # Another user's remove_photo of the same photo runs before the lock is taken
+            for path in photo_files(web_path):
+                os.remove(os.path.join(root, path.lstrip("/")))
+        calls.append(web_path)
+        return web_path
+
+    monkeypatch.setattr(acc, "store_photo", racing_store)
+    client = app.test_client()
+    user_id = add_user(app, "photo_user_race")
+    login(client, user_id)
+
+    assert upload(client, png_bytes("purple")).status_code == 302
+    assert len(calls) == 2
+    web_path = stored_photo(app, user_id)
+    assert all(os.path.isfile(os.path.join(tmp_path, path.lstrip("/"))) for path in photo_files(web_path))
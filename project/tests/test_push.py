@@ -0,0 +1,95 @@
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+from push import PushBroker, PushRelay, RelayClient
+
+SECRET = "relay-test-secret"
+
+
+def start_relay(queue_size):
+    server = PushRelay(("127.0.0.1", 0), SECRET, queue_size=queue_size)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def relay():
+    server = start_relay(100)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def connect(relay, secret=SECRET):
+    sock = socket.create_connection(relay.server_address, timeout=5)
+    sock.sendall((json.dumps({"secret": secret}) + "\n").encode())
+    return sock
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_relay_fans_out_between_workers(relay):
+    address = "%s:%d" % relay.server_address
+    sender, receiver = PushBroker(), PushBroker()
+    sender.relay = RelayClient(sender, address, SECRET)
+    receiver.relay = RelayClient(receiver, address, SECRET)
+    sender.relay.start()
+    receiver.relay.start()
+    assert wait_for(lambda: sender.relay.connected and receiver.relay.connected and len(relay.peers) == 2)
+
+    sub = receiver.subscribe(7)
+    sender.publish([7], "event", {"event_id": 1})
+    assert sub.queue.get(timeout=5) == ("event", {"event_id": 1})
+
+
+def test_relay_rejects_wrong_secret(relay):
+    listener = connect(relay)
+    intruder = connect(relay, secret="guess")
+    assert wait_for(lambda: relay.rejected == 1 and len(relay.peers) == 1)
+
+    intruder.sendall(b'{"users": [7], "event": "event", "data": {}}\n')
+    listener.settimeout(0.3)
+    with pytest.raises(socket.timeout):
+        listener.recv(1)
+
+
+def test_slow_peer_does_not_stall_relay():
+    """A worker that stops reading doesn't hold up delivery to the others"""
+
+    relay = start_relay(5000)  # Room for every line: only the slow peer's socket is full
+    slow = connect(relay)      # Never reads
+    fast = connect(relay)
+    fast.settimeout(None)
+    sender = connect(relay)
+    assert wait_for(lambda: len(relay.peers) == 3)
+
+    received = []
+
+    def read():
+        for line in fast.makefile("rb"):
+            received.append(line)
+            if line.startswith(b"last"):
+                return
+
+    reader = threading.Thread(target=read, daemon=True)
+    reader.start()
+    payload = b"x" * 8192 + b"\n"
+    for _ in range(3000):      # ~24 MB, far past the slow peer's socket buffers
+        sender.sendall(payload)
+    sender.sendall(b"last\n")
+
+    reader.join(20)
+    assert received and received[-1] == b"last\n"
+    for sock in (slow, fast, sender):
+        sock.close()
+    relay.shutdown()
+    relay.server_close()
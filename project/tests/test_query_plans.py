@@ -0,0 +1,21 @@
+import os
+
+from invite_cache import invite_cache
+from page_cache import plan_cache
+from query_plans import new_findings, run_benchmark
+
+
+def test_no_new_scans_on_hot_routes(app):
+    """Same as python query_plans.py --check: hot routes and the sweep stay on indexes"""
+
+    database = app.config["DATABASE"]
+    try:
+        analyzer = run_benchmark("small", 5, os.path.dirname(database))
+    finally:
+        # The benchmark points the app at its tier database and fills the caches
+        app.config["DATABASE"] = database
+        invite_cache.clear()
+        plan_cache.clear()
+
+    assert analyzer.findings(), "benchmark routes weren't observed"
+    assert new_findings(analyzer) == set()
@@ -0,0 +1,61 @@
+import threading
+
+from datetime import date
+
+from scheduler import ExpiryScheduler
+
+
+def wait_for(condition, timeout=5.0):
+    done = threading.Event()
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return True
+        done.wait(0.01)
+    return condition()
+
+
+def test_failed_job_runs_again(app):
+    """A job that raises (locked db, pool timeout) is retried instead of dropped"""
+
+    calls = []
+
+    def job(event_id):
+        calls.append(event_id)
+        if len(calls) == 1:
+            raise RuntimeError("database is locked")
+
+    scheduler = ExpiryScheduler()
+    scheduler.RETRY_DELAY = 0.01
+    scheduler.app, scheduler.job = app, job
+    scheduler.start(lambda: [(7, date.today())])   # Due now
+
+    assert wait_for(lambda: scheduler.runs == 1)
+    assert calls == [7, 7]
+    stats = scheduler.stats()
+    assert stats["errors"] == 1 and stats["retries"] == 1 and stats["scheduled"] == 0
+
+
+def test_concurrent_starts_load_once(app):
+    """Racing first requests start one thread, and the load happens on that thread"""
+
+    loads = []
+    release = threading.Event()
+
+    def loader():
+        loads.append(threading.current_thread().name)
+        release.wait(5)
+        return []
+
+    scheduler = ExpiryScheduler()
+    scheduler.app, scheduler.job = app, lambda event_id: None
+    starters = [threading.Thread(target=scheduler.start, args=(loader,)) for _ in range(8)]
+    for thread in starters:
+        thread.start()
+    for thread in starters:
+        thread.join(5)
+    assert not any(thread.is_alive() for thread in starters)   # Didn't wait for the load
+    release.set()
+
+    assert wait_for(lambda: len(loads) == 1)
+    assert loads == ["expiry-scheduler"]
+    assert scheduler.running
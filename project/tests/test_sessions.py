@@ -0,0 +1,43 @@
+import time
+
+import pytest
+
+import sessions
+
+from sessions import MemorySessionStore, SqliteSessionStore
+
+
+@pytest.fixture(params=["sqlite", "memory"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        return SqliteSessionStore(str(tmp_path / "sessions.db"))
+    return MemorySessionStore()
+
+
+def test_store_expires_and_sweeps(store):
+    now = time.time()
+    store.set("live", "{}", now + 60)
+    store.set("dead", "{}", now + 1)
+
+    assert store.get("live", now) is not None
+    assert store.get("dead", now + 2) is None
+    assert store.sweep(now + 2) == 1
+    assert store.get("live", now + 2) is not None
+
+    store.touch("live", now + 120)
+    assert store.get("live", now + 90) is not None
+
+
+def test_session_ends_after_ttl(app, monkeypatch):
+    """A session idle for longer than SESSION_TTL no longer logs the user in"""
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["user_id"] = 1
+        session["user_photo"] = "/static/uploads/default.png"
+    assert client.get("/").status_code == 200
+
+    later = time.time() + app.session_interface.ttl + 1
+    monkeypatch.setattr(sessions.time, "time", lambda: later)
+    response = client.get("/")
+    assert response.status_code == 302 and response.headers["Location"].endswith("/login")
@@ -0,0 +1,22 @@
+from helpers import get_db
+from usernames import taken_usernames
+
+
+def test_rename_by_another_worker_is_seen(app, client):
+    """A name taken by a rename outside this worker stops being offered as free"""
+
+    taken_usernames.refresh = 0   # Check the db on every call
+    with app.app_context():
+        db = get_db()
+        db.execute("INSERT INTO users (username) VALUES ('rename_test_before')")
+        db.commit()
+        assert taken_usernames.available("rename_test_after")
+
+        # Straight to the db, as another worker process would
+        db.execute("UPDATE users SET username = 'rename_test_after' WHERE username = 'rename_test_before'")
+        db.commit()
+        assert not taken_usernames.available("rename_test_after")
+        assert taken_usernames.available("rename_test_before")
+
+    response = client.get("/signup/check", query_string={"username": "rename_test_after"})
+    assert response.get_json()["available"] is False
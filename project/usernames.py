@@ -0,0 +1,145 @@
+import hashlib
+import math
+import os
+import threading
+import time
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter of strings: no false negatives, ~error_rate false positives at capacity"""
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = max(capacity, 1)
+        self.size = max(64, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))  # Bits
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Adapted from: Kirsch & Mitzenmacher, "Less Hashing, Same Performance"
+        # URL: https://www.eecs.harvard.edu/~michaelm/postscripts/rsa2008.pdf
+        # k bit positions from the two halves of one digest
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class TakenUsernames:
+    """Bloom filter of every username in the db, so most availability checks skip the db
+
+    Every refresh seconds users added since the last look (users.id above the last
+    loaded id) are pulled in, and a rename anywhere (username_version, bumped by a
+    trigger) rebuilds the filter. Names taken by other workers can therefore be missed
+    for up to refresh seconds; the UNIQUE constraint still rejects them on insert.
+    Deleted names stay in the filter as false positives (confirmed against the db).
+    """
+
+    def __init__(self, error_rate=0.01, refresh=5.0):
+        self.error_rate = error_rate
+        self.refresh = refresh
+        self.connect = None          # Callable returning a db connection (set by helpers)
+        self._filter = None
+        self._last_id = 0
+        self._version = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+        # Counters exposed via stats()
+        self.checks = 0
+        self.db_checks = 0
+        self.false_positives = 0
+        self.rebuilds = 0
+
+    def load(self, db=None):
+        """Build the filter from every username (sized for twice the current users)"""
+
+        db = db or self.connect()
+        version = db.execute("SELECT version FROM username_version WHERE id = 1").fetchone()[0]
+        rows = db.execute("SELECT id, username FROM users").fetchall()
+        bloom = BloomFilter(max(1024, 2 * len(rows)), self.error_rate)
+        for row in rows:
+            bloom.add(row[1])
+
+        with self._lock:
+            self._filter = bloom
+            self._last_id = max((row[0] for row in rows), default=0)
+            self._version = version
+            self._checked = time.monotonic()
+            self.rebuilds += 1
+
+    def _fresh(self, db):
+        """Load once, then every refresh seconds add new users (rebuild after a rename)"""
+
+        if self._filter is None:
+            self.load(db)
+            return
+        if time.monotonic() - self._checked < self.refresh:
+            return
+
+        version = db.execute("SELECT version FROM username_version WHERE id = 1").fetchone()[0]
+        if version != self._version:
+            self.load(db)
+            return
+
+        rows = db.execute("SELECT id, username FROM users WHERE id > ? ORDER BY id", (self._last_id,)).fetchall()
+        with self._lock:
+            for row in rows:
+                self._filter.add(row[1])
+                self._last_id = row[0]
+            self._checked = time.monotonic()
+        # Past capacity the false positive rate climbs: rebuild larger
+        if self._filter.count > self._filter.capacity:
+            self.load(db)
+
+    def add(self, username):
+        """Record a name this worker just inserted or renamed to"""
+
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(username)
+
+    def available(self, username):
+        """True if username isn't taken (db only asked when the filter says maybe)"""
+
+        db = self.connect()
+        self._fresh(db)
+        self.checks += 1
+        if username not in self._filter:
+            return True
+
+        self.db_checks += 1
+        taken = db.execute("SELECT 1 FROM users WHERE username = ?", (username,)).fetchone() is not None
+        if not taken:
+            self.false_positives += 1
+        return not taken
+
+    def stats(self):
+        """Return filter size and check counters as a dict"""
+
+        with self._lock:
+            bloom = self._filter
+            return {
+                "names": bloom.count if bloom else 0,
+                "capacity": bloom.capacity if bloom else 0,
+                "bytes": len(bloom.bits) if bloom else 0,
+                "checks": self.checks,
+                "db_checks": self.db_checks,
+                "false_positives": self.false_positives,
+                "rebuilds": self.rebuilds,
+            }
+
+
+# Shared instance (one per worker process)
+taken_usernames = TakenUsernames(
+    error_rate=float(os.environ.get("USERNAME_BLOOM_ERROR_RATE", 0.01)),
+    refresh=float(os.environ.get("USERNAME_BLOOM_REFRESH", 5)),
+)